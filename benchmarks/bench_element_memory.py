@@ -0,0 +1,88 @@
+"""Benchmark of the memory used by model elements.
+
+Builds a synthetic model of N part definitions in packages, and reports the
+size of an element object, including its __dict__ if it has one, and the
+memory allocated per element for the whole model tree, which includes the
+children lists and the model indices.
+
+Usage: python benchmarks/bench_element_memory.py [N]
+"""
+import gc
+import sys
+import tracemalloc
+
+from pysysml2.modeling import Model
+from pysysml2.modeling.element import Package, Part
+
+
+def model_table(n_elements, per_package=10):
+    """A model table dictionary like the visitor builds, kept out of the
+    measurement so only the elements are counted."""
+    table = {}
+    for idx in range(n_elements):
+        if idx % (per_package + 1) == 0:
+            idx_package, cls, name = idx, Package, "P{}".format(idx)
+            idx_parent, fqn = None, name
+        else:
+            cls, name = Part, "D{}".format(idx)
+            idx_parent = idx_package
+            fqn = "P{}::D{}".format(idx_package, idx)
+        table[idx] = dict(
+            cls=cls,
+            name="{}@{}_{}".format(name, idx, idx_parent),
+            sysml2_type="part" if cls is Part else "package",
+            idx=idx,
+            uuid="{:016x}".format(idx),
+            idx_parent=idx_parent,
+            uuid_parent=None if idx_parent is None else "{:016x}".format(idx_parent),
+            idx_related_element=None,
+            related_element_name=None,
+            value_types=None,
+            constants=[None],
+            multiplicity=None,
+            context_type="Part_defContext",
+            keywords=["def", "part"],
+            fully_qualified_name=fqn,
+            fully_qualified_name_tagged=fqn,
+            tree_level=0 if idx_parent is None else 1,
+            element_text=None,
+        )
+    return table
+
+
+def build(model, table):
+    for v in table.values():
+        kwargs = dict(v)
+        cls = kwargs.pop("cls")
+        idx_parent = kwargs["idx_parent"]
+        kwargs["parent"] = (
+            model if idx_parent is None else model.find_element_by_idx(idx_parent)
+        )
+        cls(**kwargs)
+
+
+def main(n_elements=100000):
+    table = model_table(n_elements)
+    model = Model()
+    gc.collect()
+    tracemalloc.start()
+    build(model, table)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    element = model.find_element_by_idx(1)
+    size = sys.getsizeof(element)
+    print("elements:                {}".format(n_elements))
+    print("element object bytes:    {}".format(size + _dict_size(element)))
+    print("tree bytes per element:  {:.0f}".format(current / n_elements))
+
+
+def _dict_size(obj):
+    """Size of the instance __dict__, 0 if it was never allocated."""
+    if not hasattr(obj, "__dict__") or not vars(obj):
+        return 0
+    return sys.getsizeof(vars(obj))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
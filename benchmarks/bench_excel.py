@@ -0,0 +1,55 @@
+"""Benchmark of the Excel export against the previous pandas based export,
+which built a DataFrame from Model.to_dict and wrote it with openpyxl in
+normal mode.
+
+Usage: python benchmarks/bench_excel.py [MODEL_FILE...]
+
+Defaults to the example models.
+"""
+import glob
+import os
+import sys
+import tempfile
+import timeit
+
+import pandas as pd
+
+from pysysml2.modeling import Model
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BENCHMARKS_DIR, "..", "examples", "models")
+
+
+def to_excel_pandas(model, out_file):
+    df = pd.DataFrame.from_dict(model.to_dict(), orient="index")
+    df.to_excel(out_file, index=False)
+
+
+def main(*model_files, repeat=3):
+    if not model_files:
+        model_files = sorted(glob.glob(os.path.join(MODELS_DIR, "*.sysml2")))
+    print("{:<32}{:>12}{:>12}{:>10}".format("model", "pandas", "to_excel", "speedup"))
+    with tempfile.TemporaryDirectory() as out_dir:
+        for model_file in model_files:
+            model = Model()
+            model.from_sysml2_file(model_file)
+            out_file = os.path.join(out_dir, "model.xlsx")
+            times = [
+                min(timeit.repeat(export, number=1, repeat=repeat))
+                for export in (
+                    lambda: to_excel_pandas(model, out_file),
+                    lambda: model.to_excel(out_dir),
+                )
+            ]
+            print(
+                "{:<32}{:>10.1f}ms{:>10.1f}ms{:>9.1f}x".format(
+                    os.path.basename(model_file),
+                    times[0] * 1000,
+                    times[1] * 1000,
+                    times[0] / times[1],
+                )
+            )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
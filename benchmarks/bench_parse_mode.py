@@ -0,0 +1,43 @@
+"""Benchmark of the parser prediction modes on the example models.
+
+Usage: python benchmarks/bench_parse_mode.py [REPEAT]
+"""
+import glob
+import os
+import sys
+import timeit
+
+from pysysml2.modeling import Model
+from pysysml2.modeling.model import PARSE_MODES
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BENCHMARKS_DIR, "..", "examples", "models")
+
+
+def load(model_file, parse_mode):
+    Model().from_sysml2_file(model_file, parse_mode=parse_mode)
+
+
+def main(repeat=5):
+    model_files = sorted(glob.glob(os.path.join(MODELS_DIR, "*.sysml2")))
+    print("{:<32}{:>12}{:>12}{:>10}".format("model", *PARSE_MODES, "speedup"))
+    for model_file in model_files:
+        # Warm up the ANTLR DFA cache, shared by all parsers of the grammar
+        for parse_mode in PARSE_MODES:
+            load(model_file, parse_mode)
+        times = [
+            min(timeit.repeat(lambda: load(model_file, mode), number=1, repeat=repeat))
+            for mode in PARSE_MODES
+        ]
+        print(
+            "{:<32}{:>10.1f}ms{:>10.1f}ms{:>9.1f}x".format(
+                os.path.basename(model_file),
+                times[0] * 1000,
+                times[1] * 1000,
+                times[0] / times[1],
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
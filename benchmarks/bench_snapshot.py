@@ -0,0 +1,49 @@
+"""Benchmark of loading models from binary snapshots against parsing them.
+
+Usage: python benchmarks/bench_snapshot.py [MODEL_FILE...]
+
+Defaults to the example models.
+"""
+import glob
+import os
+import sys
+import tempfile
+import timeit
+
+from pysysml2.modeling import Model
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BENCHMARKS_DIR, "..", "examples", "models")
+
+
+def main(*model_files, repeat=3):
+    if not model_files:
+        model_files = sorted(glob.glob(os.path.join(MODELS_DIR, "*.sysml2")))
+    print("{:<32}{:>12}{:>12}{:>10}".format("model", "parse", "snapshot", "speedup"))
+    with tempfile.TemporaryDirectory() as out_dir:
+        for model_file in model_files:
+            model = Model()
+            model.from_sysml2_file(model_file)
+            model.save_snapshot(out_dir)
+            snapshot = os.path.join(
+                out_dir, os.path.splitext(os.path.basename(model_file))[0] + ".snapshot"
+            )
+            times = [
+                min(timeit.repeat(load, number=1, repeat=repeat))
+                for load in (
+                    lambda: Model().from_sysml2_file(model_file),
+                    lambda: Model().load_snapshot(snapshot),
+                )
+            ]
+            print(
+                "{:<32}{:>10.1f}ms{:>10.1f}ms{:>9.1f}x".format(
+                    os.path.basename(model_file),
+                    times[0] * 1000,
+                    times[1] * 1000,
+                    times[0] / times[1],
+                )
+            )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
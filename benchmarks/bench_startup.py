@@ -0,0 +1,44 @@
+"""Benchmark of the CLI startup time: `export --help`, and a JSON export
+of an example model, each run in a new Python process.
+
+Usage: python benchmarks/bench_startup.py [REPEAT]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(BENCHMARKS_DIR, "..")
+MODEL_FILE = os.path.join(ROOT_DIR, "examples", "models", "model_test_1.sysml2")
+
+
+def run(*args):
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    subprocess.run(
+        [sys.executable, "-m", "pysysml2.cli", *args],
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def main(repeat=5):
+    with tempfile.TemporaryDirectory() as out_dir:
+        commands = {
+            "export --help": ["export", "--help"],
+            "export --format json": [
+                "export", MODEL_FILE, "--format", "json", "-o", out_dir, "--no-cache",
+            ],
+        }
+        for label, args in commands.items():
+            t = min(timeit.repeat(lambda: run(*args), number=1, repeat=repeat))
+            if "json" in args:
+                # Make sure the export ran, not just the module import
+                assert os.path.exists(os.path.join(out_dir, "model_test_1.json"))
+            print("{:<24}{:>10.1f}ms".format(label, t * 1000))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
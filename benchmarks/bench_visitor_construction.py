@@ -0,0 +1,18 @@
+"""Benchmark of the cost of constructing a model visitor, as done once per
+model file.
+
+Usage: python benchmarks/bench_visitor_construction.py [NUMBER]
+"""
+import sys
+import timeit
+
+from pysysml2.grammar.sysml2_model_visitor import ModelTreeSysML2Visitor
+
+
+def main(number=1000):
+    t = min(timeit.repeat(ModelTreeSysML2Visitor, number=number, repeat=5))
+    print("visitor construction: {:.1f}us".format(t / number * 1e6))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
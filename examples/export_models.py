@@ -16,9 +16,5 @@ for in_f in in_sysml2:
     in_f = os.path.join(in_dir, in_f)
     model = Model()
     model.from_sysml2_file(in_f)
-    model.to_csv(out_dir)
-    model.to_JSON(out_dir)
-    model.to_txt(out_dir)
-    model.to_excel(out_dir)
-    model.to_dot(out_dir)
-    model.to_png(out_dir)
+    # Exports all formats from a single flattening of the model
+    model.export(["csv", "json", "txt", "xlsx", "dot", "png"], out_dir)
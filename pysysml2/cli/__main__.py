@@ -1,15 +1,39 @@
 import os
 from pathlib import Path
-from typing import Optional
-from typer import Argument, Option, Typer
+from typing import List, Optional
+from typer import Argument, BadParameter, Exit, Option, Typer
 
 from pysysml2 import __version__
+from pysysml2.grammar.sysml2_model_visitor import ID_STRATEGIES
 from pysysml2.modeling import Model
+from pysysml2.modeling.batch import expand_model_paths, map_jobs
+from pysysml2.modeling.cache import ParseCache
+from pysysml2.modeling.model import EXPORT_FORMATS, PARSE_MODES, ExportError
 from pysysml2.cli.ui import console
 
 app = Typer()
 
 
+def _check_choice(choices, what, multiple=False):
+    """Returns an option callback, which rejects values not in choices before
+    any model file is parsed. Multiple values are comma-separated, and are
+    not case sensitive, like export formats.
+    """
+
+    def check(value: str):
+        values = [v.lower() for v in _parse_format_arg(value)] if multiple else [value]
+        for v in values:
+            if v not in choices:
+                raise BadParameter(
+                    "Unknown {} '{}', expected one of: {}".format(
+                        what, v, ", ".join(choices)
+                    )
+                )
+        return value
+
+    return check
+
+
 @app.callback()
 def main():
     """PySysML2 CLI tools."""
@@ -18,19 +42,18 @@ def main():
 
 @app.command()
 def export(
-    input: Path = Argument(
+    inputs: List[str] = Argument(
         ...,
-        metavar="MODEL_FILE",
-        help="The sysml2 model file.",
-        exists=True,
-        readable=True,
-        resolve_path=True,
+        metavar="MODEL_FILE...",
+        help="One or more sysml2 model files, directories or glob patterns. "
+        "Directories are searched recursively for *.sysml2 files.",
     ),
     format: str = Option(
         "json",
         "--format",
         help="One or more comma-separated output file formats. "
-        "Supported formats: json,txt,csv,xlsx,dot,png",
+        "Supported formats: " + ",".join(EXPORT_FORMATS),
+        callback=_check_choice(EXPORT_FORMATS, "format", multiple=True),
     ),
     out_dir: Optional[Path] = Option(
         None,
@@ -40,10 +63,46 @@ def export(
         "directory.",
         resolve_path=True,
     ),
+    id_strategy: str = Option(
+        "uuid4",
+        "--id-strategy",
+        help="How element UUIDs are generated. Supported strategies: "
+        "uuid4 (random), uuid5 (derived from the fully qualified name), "
+        "sequential",
+        callback=_check_choice(ID_STRATEGIES, "id strategy"),
+    ),
+    parse_mode: str = Option(
+        "ll",
+        "--parse-mode",
+        help="Parser prediction mode. Supported modes: ll, sll (faster, "
+        "falls back to ll on failure)",
+        callback=_check_choice(PARSE_MODES, "parse mode"),
+    ),
+    cache: bool = Option(
+        True,
+        "--cache/--no-cache",
+        help="Reuse parsed models from the parse cache, keyed by file "
+        "content. The cache directory defaults to ~/.cache/pysysml2, or "
+        "$PYSYSML2_CACHE_DIR if set.",
+    ),
+    jobs: int = Option(
+        1,
+        "-j",
+        "--jobs",
+        min=0,
+        help="Number of model files to export in parallel, in separate "
+        "processes. 0 uses one process per CPU.",
+    ),
+    threads: int = Option(
+        1,
+        "--threads",
+        min=1,
+        help="Number of formats of a model file to write concurrently, in "
+        "threads.",
+    ),
 ):
-    """Export a SysML v2 model to various file formats."""
-    model = Model()  # Create Model object
-    model.from_sysml2_file(input)  # Parse the textual model
+    """Export SysML v2 models to various file formats."""
+    model_files, errors = _expand_model_args(inputs)
 
     # Create output directory if not exist
     out_dir = out_dir or Path.cwd()
@@ -52,52 +111,83 @@ def export(
     console.print(f"Using output directory: {out_dir}")
 
     fmts = _parse_format_arg(format)
-    for fmt in fmts:
-        _serialize_model(model, fmt, out_dir)
+    options = dict(
+        id_strategy=id_strategy, parse_mode=parse_mode, cache=cache, threads=threads
+    )
+    args = [(model_file, fmts, out_dir, options) for model_file in model_files]
+    results = map_jobs(_export_model_file, args, jobs)
+    exported = sum(error is None for _, error in results)
+    errors += [(f, error) for f, error in results if error is not None]
+
+    # Summary of the batch, failures don't abort the other exports
+    if len(model_files) > 1 or errors:
+        console.print(f"Exported {exported} of {len(model_files)} model file(s).")
+    for model_file, error in errors:
+        console.error(ename=str(model_file), message=error)
+    if errors:
+        raise Exit(code=1)
+
+
+def _expand_model_args(inputs: List[str]):
+    """Expands model file, directory and glob pattern arguments, see
+    expand_model_paths. Model files whose output files would collide with
+    an earlier one are returned as errors.
+    """
+    paths, expand_errors = expand_model_paths(inputs)
+    errors = [(arg, str(error)) for arg, error in expand_errors]
+    model_files, stems = [], {}
+    for path in paths:
+        # Output files are named after the model file
+        if path.stem in stems:
+            errors.append(
+                (path, f"Output file names collide with {stems[path.stem]}")
+            )
+            continue
+        stems[path.stem] = path
+        model_files.append(path)
+    return model_files, errors
+
+
+def _export_model_file(model_file: Path, fmts: List[str], out_dir: Path, options):
+    """Parses one model file and exports it to all formats. Runs in a worker
+    process for parallel exports, so errors are returned, not raised.
+
+    Returns:
+        tuple: The model file, and the error message or None.
+    """
+    try:
+        model = Model()  # Create Model object
+        model.from_sysml2_file(
+            model_file,
+            id_strategy=options["id_strategy"],
+            parse_mode=options["parse_mode"],
+            cache=ParseCache() if options["cache"] else None,
+        )  # Parse the textual model
+        console.print(f"Exporting {model_file.name} to {', '.join(fmts)}...")
+        try:
+            model.export(fmts, out_dir, threads=options["threads"])
+        except ExportError as e:
+            # Imported here, as graphviz is only needed for png
+            from graphviz import ExecutableNotFound
+
+            if not isinstance(e.errors.get("png"), ExecutableNotFound):
+                raise
+            # png is skipped, but the file fails if other formats did
+            console.error(
+                message="Unable to export to png. "
+                "Graphviz `dot` command not found."
+            )
+            errors = dict((k, v) for k, v in e.errors.items() if k != "png")
+            if errors:
+                raise ExportError(errors)
+    except Exception as e:
+        return model_file, f"{type(e).__name__}: {e}"
+    return model_file, None
 
 
 def _parse_format_arg(format: str):
     return format.split(",")
 
 
-def _serialize_model(model: Model, format: str, out_dirpath: Path):
-    format = format.lower()
-    out_dir = str(out_dirpath)
-
-    if format == "json":
-        console.print(f"Exporting to JSON...")
-        model.to_JSON(out_dir)
-
-    elif format == "csv":
-        console.print(f"Exporting to csv...")
-        model.to_csv(out_dir)
-
-    elif format == "txt":
-        console.print(f"Exporting to txt...")
-        model.to_txt(out_dir)
-
-    elif format in ("excel", "xlsx"):
-        console.print(f"Exporting to xlsx...")
-        model.to_excel(out_dir)
-
-    elif format == "png":
-
-        try:
-            console.print(f"Exporting to png...")
-            model.to_png(out_dir)
-
-        except FileNotFoundError as e:
-            if "No such file or directory: 'dot'" in str(e):
-                console.error(
-                    message="Unable to export to png. "
-                    "Graphviz `dot` command not found."
-                )
-            else:
-                raise e
-
-    elif format == "dot":
-        console.print(f"Exporting to dot...")
-        model.to_dot(out_dir)
-
-    else:
-        raise ValueError(f"Unknown format '{format}'")
+if __name__ == "__main__":
+    app()
@@ -1,7 +1,19 @@
-from antlr4 import Lexer, Parser
+from array import array
+import codecs
+import re
+import sys
+
+from antlr4 import InputStream, Lexer, Parser
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorStrategy import BailErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
 from enum import Enum
+from functools import lru_cache
 
 
+# The enums below are built by reflection over the generated lexer and parser
+# classes, so they are cached: each is built once per process and shared.
+@lru_cache(maxsize=None)
 def build_lexer_literal_enum(lexer: Lexer, enum_name, prefix="KW_"):
     dd = {
         k: lexer.literalNames[getattr(lexer, k)].strip("'")
@@ -11,6 +23,7 @@ def build_lexer_literal_enum(lexer: Lexer, enum_name, prefix="KW_"):
     return Enum(enum_name, dd)
 
 
+@lru_cache(maxsize=None)
 def build_parser_context_names_enum(parser: Parser, enum_name, contains="Context"):
 
     dd = {k: k for k in dir(parser) if contains in k and k[0].isupper()}
@@ -34,3 +47,116 @@ def get_overridden_methods(cls):
 
     # return the intersection of both
     return parent_attrs.intersection(methods)
+
+
+def parse_sll_first(parser: Parser, rule: str):
+    """Two-stage parsing. The rule is first parsed with the faster SLL
+    prediction mode and a bail-out error strategy. Only if that fails, the
+    input is parsed again with full LL prediction and the parser's own error
+    strategy and listeners, so syntax errors are reported and recovered from
+    exactly as with a plain LL parse.
+    See: https://github.com/antlr/antlr4/blob/master/doc/faq/general.md
+
+    Args:
+        parser (Parser): The parser, positioned at the start of its input.
+        rule (str): Name of the start rule, e.g. "model".
+
+    Returns:
+        _type_: The parse tree of the rule.
+    """
+    start_rule = getattr(parser, rule)
+    error_handler = parser._errHandler
+    listeners = parser._listeners
+    parser._interp.predictionMode = PredictionMode.SLL
+    parser._errHandler = BailErrorStrategy()
+    parser.removeErrorListeners()
+    try:
+        return start_rule()
+    except ParseCancellationException:
+        pass
+    finally:
+        parser._errHandler = error_handler
+        parser._listeners = listeners
+        parser._interp.predictionMode = PredictionMode.LL
+    # Second stage, rewind the token stream and parse with full LL
+    parser.reset()
+    return start_rule()
+
+
+# Encodings in which ASCII text is encoded as is, one byte per character
+_ASCII_COMPATIBLE_ENCODINGS = ("ascii", "utf-8", "iso8859-1")
+_NON_ASCII_BYTE = re.compile(rb"[^\x00-\x7f]")
+_UTF32_NATIVE = "utf-32-le" if sys.byteorder == "little" else "utf-32-be"
+
+
+class CodePointStream(InputStream):
+    """Input stream over any sequence of code points. antlr4.InputStream
+    converts its text to a list of int objects, one per character, which
+    takes several times the memory of the text. Here the code points are
+    bytes-like (ASCII text) or an array of 32 bit code points, and token
+    text is sliced from the original text or bytes when it is read.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, data, text=None, name="<buffer>"):
+        """_summary_
+
+        Args:
+            data (bytes-like or array): The code points.
+            text (str, optional): The decoded text, if it is available.
+                Token text is otherwise decoded from data, which must then
+                be ASCII. Defaults to None.
+            name (str, optional): Source name of the stream.
+        """
+        # InputStream.__init__ would build the code point list
+        self.name = name
+        self.strdata = text
+        self.data = data
+        self._index = 0
+        self._size = len(data)
+
+    def getText(self, start: int, stop: int):
+        if stop >= self._size:
+            stop = self._size - 1
+        if start >= self._size:
+            return ""
+        if self.strdata is None:
+            return str(self.data[start : stop + 1], "ascii")
+        return self.strdata[start : stop + 1]
+
+    def __str__(self):
+        return self.getText(0, self._size - 1)
+
+
+def code_point_stream(data, encoding="utf-8", name="<buffer>"):
+    """Creates an input stream for a lexer from text, or from encoded text
+    in any bytes-like object, e.g. bytes, bytearray, memoryview or mmap.
+    ASCII text in an ASCII compatible encoding is lexed in place, without
+    decoding or copying it, so an mmap is only paged in as it is read.
+
+    Args:
+        data (str or bytes-like): The text.
+        encoding (str, optional): Encoding of bytes-like data. Defaults to
+            "utf-8".
+        name (str, optional): Source name of the stream.
+
+    Raises:
+        UnicodeDecodeError: The data is not valid in the encoding.
+
+    Returns:
+        CodePointStream: The input stream.
+    """
+    if isinstance(data, str):
+        if data.isascii():
+            return CodePointStream(data.encode("ascii"), data, name)
+        code_points = array("I", data.encode(_UTF32_NATIVE))
+        return CodePointStream(code_points, data, name)
+    if isinstance(data, memoryview):
+        data = data.cast("B")
+    if (
+        codecs.lookup(encoding).name in _ASCII_COMPATIBLE_ENCODINGS
+        and _NON_ASCII_BYTE.search(data) is None
+    ):
+        return CodePointStream(data, None, name)
+    return code_point_stream(str(data, encoding), name=name)
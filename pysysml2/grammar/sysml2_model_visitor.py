@@ -1,7 +1,7 @@
+import sys
 from typing import get_type_hints
 import uuid
-
-import pandas as pd
+import warnings
 
 from pysysml2.grammar.distpy.SysML2Lexer import SysML2Lexer
 from pysysml2.grammar.distpy.SysML2Parser import SysML2Parser
@@ -22,31 +22,307 @@ _ELMNT_ID_CTX_NAME = "_PySysML2_NAME"
 _SYSML2_TYPE_NAME = "_PySysML2_SYSML2_TYPE"
 _FQN_TAG_NAME = "_PySysML2_FQN_TAGGED"
 _FQN_NAME = "_PySysML2_FQN"
+_TREE_LEVEL_NAME = "_PySysML2_TREE_LEVEL"
+_IDX_RELATED_CTX_NAME = "_PySysML2_IDX_RELATED"
+_NODE_CTX_NAME = "_PySysML2_NODE"
 # PySysML2 specific tags and names
 _UNNAMED_ELEMENT_NAME = "PySysML2_GENERATED_NAME"
 _SYSML2_RELATIONSHIP_SPECIALIZES = "specializes"
 _SYSML2_RELATIONSHIP_REDEFINES = "redefines"
 _SYSML2_RELATIONSHIP_ABOUT = "about"
 _SYSML2_RELATIONSHIP_REFERENCES = "references"
+# Namespace of the deterministic, name based element UUIDs
+_UUID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_DNS, "pysysml2")
+# Columns of the model table, in order
+MODEL_TABLE_COLUMNS = (
+    "name",
+    "sysml2_type",
+    "parent",
+    "idx",
+    "uuid",
+    "idx_parent",
+    "uuid_parent",
+    "idx_related_element",
+    "related_element_name",
+    "value_types",
+    "constants",
+    "multiplicity",
+    "context_type",
+    "keywords",
+    "fully_qualified_name",
+    "fully_qualified_name_tagged",
+    "tree_level",
+    "element_text",
+)
+# Model table DataFrame dtypes
+_CATEGORY_COLUMNS = ("sysml2_type", "context_type", "sysml2_layer", "archtype")
+_NULLABLE_INT_COLUMNS = ("idx", "idx_parent", "idx_related_element", "tree_level")
+
+
+def _match_keywords(type_name):
+    """Matches the SysML2 keywords against the name of a parser context type.
+
+    Args:
+        type_name (str): Name of the parser context type.
+
+    Returns:
+        tuple: The keywords, in the order of the lexer enumeration.
+    """
+    type_lower = type_name.split("Context")[0].lower()
+    tags = []
+    for kw in _SML2_KWS:
+        # Match keyword as a whole word with underscores as boundaries
+        # This prevents "port" from matching inside "import"
+        kw_lower = kw.value.lower()
+
+        if (
+            _DLMTR_UNDRSCR + kw_lower + _DLMTR_UNDRSCR in type_lower  # _keyword_
+            or type_lower.startswith(kw_lower + _DLMTR_UNDRSCR)        # keyword_ at start
+            or type_lower.endswith(_DLMTR_UNDRSCR + kw_lower)          # _keyword at end
+            or kw_lower == type_lower                                   # exact match
+        ):
+            tags.append(kw.value)
+    return tuple(tags)
+
+
+# Keywords of every parser context type, e.g. 'Part_defContext': ('def', 'part')
+_CONTEXT_KEYWORDS = {
+    k: _match_keywords(k)
+    for k in dir(SysML2Parser)
+    if k.endswith("Context") and k[0].isupper()
+}
+
+
+def _uuid4_ids():
+    """Random UUIDs. Every visit of a model produces different IDs."""
+
+    def next_id(idx, fqn, fqn_tagged):
+        return str(uuid.uuid4())
+
+    return next_id
+
+
+def _uuid5_ids():
+    """Deterministic UUIDs derived from the fully qualified name, stable
+    across visits of the same model. Elements with the same fully qualified
+    name fall back to a UUID derived from the tagged fully qualified name.
+    """
+    issued = set()
+
+    def next_id(idx, fqn, fqn_tagged):
+        uid = str(uuid.uuid5(_UUID_NAMESPACE, fqn))
+        if uid in issued:
+            uid = str(uuid.uuid5(_UUID_NAMESPACE, fqn_tagged))
+        issued.add(uid)
+        return uid
+
+    return next_id
+
+
+def _sequential_ids():
+    """Sequential 64-bit IDs, as 16 hex digits. The cheapest strategy, but
+    IDs are only unique within a model.
+    """
+
+    def next_id(idx, fqn, fqn_tagged):
+        return "{:016x}".format(idx)
+
+    return next_id
+
+
+# Element ID strategies, by name. Each entry returns a new ID generator,
+# called as next_id(idx, fqn, fqn_tagged) for every visited element.
+ID_STRATEGIES = {
+    "uuid4": _uuid4_ids,
+    "uuid5": _uuid5_ids,
+    "sequential": _sequential_ids,
+}
+
+
+def id_generator(id_strategy):
+    """Returns a new element ID generator.
+
+    Args:
+        id_strategy (str or callable): One of the ID_STRATEGIES names, or a
+            callable next_id(idx, fqn, fqn_tagged), which is returned as is.
+
+    Raises:
+        ValueError: Unknown ID strategy name.
+
+    Returns:
+        callable: next_id(idx, fqn, fqn_tagged), returning a string.
+    """
+    if callable(id_strategy):
+        return id_strategy
+    if id_strategy not in ID_STRATEGIES:
+        raise ValueError(
+            "Unknown id strategy '{}', expected one of: {}".format(
+                id_strategy, ", ".join(ID_STRATEGIES)
+            )
+        )
+    return ID_STRATEGIES[id_strategy]()
+
+
+def tag_name(name, idx, idx_parent):
+    """Returns the PySysML2 tagged name of an element, e.g. Board@4_3, made
+    unique by the index of the element and of its parent. Unnamed elements
+    get a generated name.
+
+    Args:
+        name (str): Name of the element, or None if it is unnamed.
+        idx (int): Index of the element.
+        idx_parent (int): Index of the parent element, or None.
+
+    Returns:
+        str: The tagged name.
+    """
+    name = (
+        "{}{}{}{}{}".format(
+            _UNNAMED_ELEMENT_NAME, _DLMTR_UNDRSCR, idx, _DLMTR_UNDRSCR, idx_parent
+        )
+        if name is None
+        else name
+    )
+    return "{}{}{}{}{}".format(name, _DLMTR_AT, idx, _DLMTR_UNDRSCR, idx_parent)
+
+
+def _element_row(element):
+    """Returns the model table row of a model element. The parent is the
+    parent element, as in the rows the Model builds elements from.
+    """
+    row = {k: getattr(element, k) for k in MODEL_TABLE_COLUMNS}
+    row["parent"] = element.parent
+    return row
+
+
+def build_model_table_df(model_table_dict):
+    """Returns the model table as a DataFrame with explicit dtypes: the
+    low cardinality string columns are categoricals, and the index columns
+    are nullable integers.
+
+    Args:
+        model_table_dict (dict): Model table rows, keyed by element index.
+
+    Returns:
+        pandas.DataFrame: The model table, one row per element.
+    """
+    rows = list(model_table_dict.values())
+    columns = list(rows[0]) if rows else list(MODEL_TABLE_COLUMNS)
+    return _typed_model_table_df(
+        {k: [row[k] for row in rows] for k in columns}, list(model_table_dict)
+    )
+
+
+def _typed_model_table_df(columns, index):
+    """Returns a DataFrame of the model table columns, a list of values per
+    column name, with the dtypes of build_model_table_df. Building the
+    DataFrame from columns is much faster than from a dict of rows.
+    """
+    # Imported here, as pandas is slow to import and only used for tables
+    import pandas as pd
+
+    df = pd.DataFrame(columns, index=index)
+    for column in _CATEGORY_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype("category")
+    for column in _NULLABLE_INT_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype("Int64")
+    return df
 
 
 class ModelTreeSysML2Visitor(SysML2Visitor):
-    def __init__(self) -> None:
-        """_summary_"""
+    # Names of the contexts visited by the overridden visit methods, see
+    # _map_systems_types
+    _focused_contexts = None
+
+    def __init__(
+        self, intern_names=False, id_strategy="uuid4", element_builder=None
+    ) -> None:
+        """_summary_
+
+        Args:
+            intern_names (bool, optional): Intern element names and fully
+                qualified names, so that equal strings are stored once.
+                Defaults to False.
+            id_strategy (str or callable, optional): How element UUIDs are
+                generated. One of the ID_STRATEGIES names, or a callable
+                next_id(idx, fqn, fqn_tagged) returning a string. Defaults
+                to "uuid4".
+            element_builder (callable, optional): Single pass mode. Called
+                as element_builder(row) with each model table row as it is
+                visited, with row["parent"] set to the object returned for
+                the parent element, or None for top level elements. Returns
+                the object built for the element. Rows are not kept, and
+                model_table_dict is built from the returned objects when
+                first accessed. Defaults to None.
+
+        Raises:
+            ValueError: Unknown ID strategy name.
+        """
         super().__init__()
-        self.model_table_dict = {}
+        self.intern_names = intern_names
+        self._next_id = id_generator(id_strategy)
+        self._element_builder = element_builder
+        self._model_table_dict = {}
+        # Cached model_table_df, and the element count it was built at
+        self._model_table_df = None
+        self._model_table_df_count = None
         self.element_count = 0
-        self.element_ctxs = {}
-        self.idxs = []
+        # (name, ctx) of every element, in visit order. The position of an
+        # element in the list is its index.
+        self.element_ctxs = []
         self.parser_contexts_dict = antlr4_helper.build_parser_context_names_enum(
             SysML2Parser, "Contexts"
         )
         self.focused_contexts = self._map_systems_types()
         self.names_to_idxs_dict = {}
+        # Symbol table of named declarations, keyed by short name and by fully
+        # qualified name. Values are lists of element indices, in visit order.
+        self.symbols_by_name = {}
+        self.symbols_by_fqn = {}
+        # (idx, name, candidate idxs) for every reference that matched more
+        # than one declaration
+        self.ambiguous_references = []
+        # (idx, name) for every reference that matched no declaration, e.g.
+        # a reference to an element of another model file
+        self.unresolved_references = []
+        # (idx, namespace, wildcard) for every import, e.g. (idx, "A::B",
+        # True) for import A::B::*;
+        self.imports = []
+
+    @property
+    def idxs(self):
+        """Indices of the visited elements. Indices are assigned in visit
+        order, so these are always 0 .. element_count - 1.
+        """
+        return range(self.element_count)
+
+    @property
+    def model_table_dict(self):
+        """Model table dictionary: a row of element attributes per element,
+        keyed by element index. In single pass mode, the rows are read from
+        the built elements when first accessed.
+        """
+        if (
+            self._element_builder is not None
+            and len(self._model_table_dict) != self.element_count
+        ):
+            self._model_table_dict = {
+                idx: _element_row(getattr(ctx, _NODE_CTX_NAME))
+                for idx, (_, ctx) in enumerate(self.element_ctxs)
+            }
+        return self._model_table_dict
 
     @property
     def model_table_df(self):
-        return pd.DataFrame.from_dict(self.model_table_dict, orient="index")
+        """The model table as a DataFrame, see build_model_table_df. Built
+        on first access, and rebuilt only after more elements are visited.
+        """
+        if self._model_table_df_count != self.element_count:
+            self._model_table_df = build_model_table_df(self.model_table_dict)
+            self._model_table_df_count = self.element_count
+        return self._model_table_df
 
     def _model_table_builder(self, ctx):
         """ " Builds a model table dictionary. This dictionary is the primary
@@ -64,14 +340,14 @@ class ModelTreeSysML2Visitor(SysML2Visitor):
         """
         # Handle element indices and global UUIDs
         ########################################################################
-        if self.element_count in self.idxs:
+        # Every index below element_count has been recorded exactly once
+        if len(self.element_ctxs) != self.element_count:
             raise Exception(
                 "Duplicate element index {} \
                 came as a complete surprise!".format(
                     self.element_count
                 )
             )
-        self.idxs.append(self.element_count)
         if hasattr(ctx, _IDX_CTX_NAME):
             raise Exception(
                 "Visited element index {} \
@@ -93,32 +369,13 @@ class ModelTreeSysML2Visitor(SysML2Visitor):
                 )
             )
         setattr(ctx, _IDX_PARENT_CTX_NAME, idx_parent)
-        # Global Universally Unique Identifier (UUID)
-        # Generate and save the UUID in the ctx object
-        uuid_ctx = str(uuid.uuid4())
-        if hasattr(ctx, _UUID_CTX_NAME):
-            raise Exception(
-                "Visited element index {} \
-                twice, which came as a complete surprise!".format(
-                    self.element_count
-                )
-            )
-        setattr(ctx, _UUID_CTX_NAME, uuid_ctx)
-        # Retrieve the parent UUID and record it in the ctx object
-        uuid_parent_ctx = self._get_parent_UUID(ctx)
-        if hasattr(ctx, _UUID_PARENT_CTX_NAME):
-            raise Exception(
-                "Visited element index {} \
-                twice, which came as a complete surprise!".format(
-                    self.element_count
-                )
-            )
-        setattr(ctx, _UUID_PARENT_CTX_NAME, uuid_parent_ctx)
 
         # Context type, e.g. 'Sysml2_packageContext'
         # Context types trace back to the SysML2 grammar rules
         context_type = type(ctx).__name__
         names = self._get_ID(ctx)
+        if self.intern_names:
+            names = [sys.intern(n) if n is not None else None for n in names]
         name = self._tag_name(names[0], idx, idx_parent)
         self.names_to_idxs_dict[name] = idx  # TODO: replace when better UIDs
         # Save the PySysML2 generated name in the ctx object for easy access
@@ -131,8 +388,8 @@ class ModelTreeSysML2Visitor(SysML2Visitor):
                 )
             )
         setattr(ctx, _ELMNT_ID_CTX_NAME, name)
-        # Record the ctx object for this element in the element_ctxs dictionary
-        self.element_ctxs[getattr(ctx, _IDX_CTX_NAME)] = names[0], ctx
+        # Record the ctx object for this element in the element_ctxs list
+        self.element_ctxs.append((names[0], ctx))
         # Get the name of the parent element generated by PySysML2.
         # If the parent element is None, then the parent element is the root,
         # and the parent element name is _ROOT_ELEMENT_NAME
@@ -161,6 +418,30 @@ class ModelTreeSysML2Visitor(SysML2Visitor):
             )
         setattr(ctx, _FQN_NAME, fqn)
         setattr(ctx, _FQN_TAG_NAME, fqn_tagged)
+        setattr(ctx, _TREE_LEVEL_NAME, tree_level)
+        # Global Universally Unique Identifier (UUID)
+        # Generate and save the UUID in the ctx object. Deterministic ID
+        # strategies derive it from the fully qualified name.
+        uuid_ctx = self._next_id(idx, fqn, fqn_tagged)
+        if hasattr(ctx, _UUID_CTX_NAME):
+            raise Exception(
+                "Visited element index {} \
+                twice, which came as a complete surprise!".format(
+                    self.element_count
+                )
+            )
+        setattr(ctx, _UUID_CTX_NAME, uuid_ctx)
+        # Retrieve the parent UUID and record it in the ctx object
+        uuid_parent_ctx = self._get_parent_UUID(ctx)
+        if hasattr(ctx, _UUID_PARENT_CTX_NAME):
+            raise Exception(
+                "Visited element index {} \
+                twice, which came as a complete surprise!".format(
+                    self.element_count
+                )
+            )
+        setattr(ctx, _UUID_PARENT_CTX_NAME, uuid_parent_ctx)
+
         # Increment the element count
         self.element_count += 1
 
@@ -184,9 +465,12 @@ class ModelTreeSysML2Visitor(SysML2Visitor):
         # TODO: (20240805) HANDLE ALL LOGIC FOR RELATIONSHIP IN VISITOR FUNCTION
         # Leaving existing in for now, but connect relationship is handled correctly
         
+        n_ambiguous = len(self.ambiguous_references)
         related_element_name_root = names[1] if len(names) > 1 else None
         related_element_name, idx_related_element = (
-            self._get_related_element_name_idx(related_element_name_root)
+            self._get_related_element_name_idx(
+                related_element_name_root, idx, idx_parent
+            )
             if related_element_name_root is not None
             else (None, None)
         )
@@ -195,7 +479,22 @@ class ModelTreeSysML2Visitor(SysML2Visitor):
             (
                 related_element_name,
                 idx_related_element,
-            ) = self._get_related_element_name_idx(name)
+            ) = self._get_redefined_element_name_idx(names[0], idx, idx_parent)
+            related_element_name_root = names[0]
+        # Record references that matched nothing. Imports are recorded
+        # separately, see visitImport_package.
+        if (
+            idx_related_element is None
+            and related_element_name_root is not None
+            and len(self.ambiguous_references) == n_ambiguous
+            and getattr(ctx, _SYSML2_TYPE_NAME) != _SML2_KWS.KW_IMPORT.value
+        ):
+            self.unresolved_references.append((idx, related_element_name_root.strip()))
+        # Register the declaration after resolving its references, so that an
+        # element never resolves to itself. Redefinitions reuse the name of
+        # the feature they redefine, so they don't declare a new symbol.
+        if names[0] is not None and _SML2_KWS.KW_REDEFINES.value not in keywords:
+            self._add_symbol(names[0].strip(), fqn, idx)
         
         # Handle connect relationship
         if hasattr(ctx, "PySysML2_source_ids") or hasattr(ctx, "PySysML2_target_ids"):
@@ -209,8 +508,10 @@ class ModelTreeSysML2Visitor(SysML2Visitor):
             related_element_name.append(getattr(ctx, "PySysML2_from_ids"))
             related_element_name.append(getattr(ctx, "PySysML2_to_ids"))
 
+        setattr(ctx, _IDX_RELATED_CTX_NAME, idx_related_element)
+
         # Record the data for this element in the model table dictionary
-        self.model_table_dict[idx] = {
+        row = {
             "name": name,
             "sysml2_type": getattr(ctx, _SYSML2_TYPE_NAME),
             "parent": name_parent,
@@ -230,51 +531,64 @@ class ModelTreeSysML2Visitor(SysML2Visitor):
             "tree_level": tree_level,
             "element_text": comment_text,
         }
+        if self._element_builder is None:
+            self._model_table_dict[idx] = row
+        else:
+            # Single pass mode: build the element now, under the element
+            # built for the parent ctx
+            row["parent"] = (
+                getattr(self.element_ctxs[idx_parent][1], _NODE_CTX_NAME)
+                if idx_parent is not None
+                else None
+            )
+            setattr(ctx, _NODE_CTX_NAME, self._element_builder(row))
 
     def _map_systems_types(self):
-        funs = antlr4_helper.get_overridden_methods(ModelTreeSysML2Visitor)
-        contexts = [
-            get_type_hints(getattr(self, fun))["ctx"].__name__
-            for fun in funs
-            if fun.startswith("visit")
-        ]
-        return contexts
+        """Returns the names of the contexts visited by the overridden visit
+        methods. These are found by reflection once, and shared by all
+        visitors.
+        """
+        cls = ModelTreeSysML2Visitor
+        if cls._focused_contexts is None:
+            funs = antlr4_helper.get_overridden_methods(cls)
+            cls._focused_contexts = tuple(
+                get_type_hints(getattr(cls, fun))["ctx"].__name__
+                for fun in funs
+                if fun.startswith("visit")
+            )
+        return list(cls._focused_contexts)
 
     def _tag_name(self, name, uid, uid_parent):
-        name = (
-            "{}{}{}{}{}".format(
-                _UNNAMED_ELEMENT_NAME, _DLMTR_UNDRSCR, uid, _DLMTR_UNDRSCR, uid_parent
-            )
-            if name is None
-            else name
-        )
-        return "{}{}{}{}{}".format(name, _DLMTR_AT, uid, _DLMTR_UNDRSCR, uid_parent)
+        return tag_name(name, uid, uid_parent)
 
     def _get_fully_qualified_name(self, ctx):
-        """_summary_
+        """Derives the fully qualified name, the tagged fully qualified name
+        and the tree level of an element from the values already recorded in
+        the ctx object of its parent. Parents are always visited before their
+        children, so this is constant time per element.
 
         Args:
-            ctx (_type_): _description_
+            ctx (_type_): The ctx object of the element, with its PySysML2
+                name and parent index already recorded.
 
         Returns:
-            _type_: _description_
+            tuple: fqn, fqn_tagged, tree_level
         """
-
-        ctxs = []  # Initialize the list of contexts
-        uid = getattr(ctx, _IDX_CTX_NAME)  # Initialize the UID
-        while uid is not None and uid >= 0:  # While the UID is valid
-            # Append the context and update from parent
-            ctx = self.element_ctxs[uid][1]
-            uid_parent = getattr(ctx, _IDX_PARENT_CTX_NAME)
-            ctxs.append(ctx)
-            uid = uid_parent
-        names_tagged = [getattr(ctx, _ELMNT_ID_CTX_NAME) for ctx in ctxs]
-        names = [name.split(_DLMTR_AT)[0] for name in names_tagged]
-        # Names should appear like Parent1:: ... ParentN::Child
-        fqn = _DLMTR_FQN.join(reversed(names))
-        fqn_tagged = _DLMTR_FQN.join(reversed(names_tagged))
-        # The level in the tree of the element is the length of the FQN
-        tree_level = len(ctxs) - 1
+        name_tagged = getattr(ctx, _ELMNT_ID_CTX_NAME)
+        name = name_tagged.split(_DLMTR_AT)[0]
+        idx_parent = getattr(ctx, _IDX_PARENT_CTX_NAME)
+        if idx_parent is None:
+            # Names should appear like Parent1:: ... ParentN::Child
+            fqn, fqn_tagged, tree_level = name, name_tagged, 0
+        else:
+            ctx_parent = self.element_ctxs[idx_parent][1]
+            fqn = "{}{}{}".format(getattr(ctx_parent, _FQN_NAME), _DLMTR_FQN, name)
+            fqn_tagged = "{}{}{}".format(
+                getattr(ctx_parent, _FQN_TAG_NAME), _DLMTR_FQN, name_tagged
+            )
+            tree_level = getattr(ctx_parent, _TREE_LEVEL_NAME) + 1
+        if self.intern_names:
+            fqn, fqn_tagged = sys.intern(fqn), sys.intern(fqn_tagged)
 
         return fqn, fqn_tagged, tree_level
 
@@ -420,30 +734,22 @@ class ModelTreeSysML2Visitor(SysML2Visitor):
         return None
 
     def _get_keywords(self, type_name):
-        """_summary_
+        """Returns the SysML2 keywords of a parser context type. The keywords
+        only depend on the context type, so they are looked up in a table
+        that is computed once per context type.
 
         Args:
-            type_name (_type_): _description_
+            type_name (str): Name of the parser context type, e.g.
+                'Sysml2_packageContext'.
 
         Returns:
-            _type_: _description_
+            list: The keywords, e.g. ['package'].
         """
-        type_name = type_name.split("Context")[0]
-        tags = []
-        for kw in _SML2_KWS:
-            # Match keyword as a whole word with underscores as boundaries
-            # This prevents "port" from matching inside "import"
-            kw_lower = kw.value.lower()
-            type_lower = type_name.lower()
-
-            if (
-                _DLMTR_UNDRSCR + kw_lower + _DLMTR_UNDRSCR in type_lower  # _keyword_
-                or type_lower.startswith(kw_lower + _DLMTR_UNDRSCR)        # keyword_ at start
-                or type_lower.endswith(_DLMTR_UNDRSCR + kw_lower)          # _keyword at end
-                or kw_lower == type_lower                                   # exact match
-            ):
-                tags.append(kw.value)
-        return tags
+        keywords = _CONTEXT_KEYWORDS.get(type_name)
+        if keywords is None:
+            # Context types that are not part of the generated parser
+            keywords = _CONTEXT_KEYWORDS[type_name] = _match_keywords(type_name)
+        return list(keywords)
 
     def _get_comment_text(self, ctx):
         """_summary_
@@ -465,33 +771,111 @@ class ModelTreeSysML2Visitor(SysML2Visitor):
         else:
             return [comment.getText()]
 
-    def _get_related_element_name_idx(self, name):
-        """_summary_
+    def _add_symbol(self, name, fqn, idx):
+        """Records a named declaration in the symbol table.
+
+        Args:
+            name (str): Short name of the element, without PySysML2 tags.
+            fqn (str): Fully qualified name of the element.
+            idx (int): Index of the element.
+        """
+        self.symbols_by_name.setdefault(name, []).append(idx)
+        self.symbols_by_fqn.setdefault(fqn, []).append(idx)
+
+    def _get_related_element_name_idx(self, name, idx, idx_parent):
+        """Resolves the name of a related element to its PySysML2 tagged name
+        and index. The name is looked up as a fully qualified name in each
+        enclosing namespace, innermost first, and then as a short name
+        anywhere in the model. Only elements visited before the referencing
+        element can be resolved.
 
         Args:
-            name (_type_): _description_
+            name (str): The name of the related element, as written in the
+                model. May be qualified, e.g. Package::Element.
+            idx (int): Index of the referencing element.
+            idx_parent (int): Index of the parent of the referencing element.
 
         Raises:
-            Exception: _description_
+            Exception: The related element is unnamed.
 
         Returns:
-            _type_: _description_
+            tuple: Tagged name and index of the related element, or
+                (None, None) if the name is unknown or ambiguous.
         """
-        name_root = name.split(_DLMTR_AT)[0]
-        if name_root == _UNNAMED_ELEMENT_NAME:
+        if name is None or name.split(_DLMTR_AT)[0] == _UNNAMED_ELEMENT_NAME:
             raise Exception(
                 "Relation to unamed element {} \
                 came as a complete surprise!".format(
                     name
                 )
             )
-        for k, v in self.element_ctxs.items():
-            if v[0] is None:
-                continue
-            if v[0].split(_DLMTR_AT)[0].strip() == name_root.strip():
-                return getattr(v[1], _ELMNT_ID_CTX_NAME), k
+        name = name.strip()
+        # Scope-aware lookup through the enclosing namespaces
+        scope_idx = idx_parent
+        while scope_idx is not None:
+            scope_ctx = self.element_ctxs[scope_idx][1]
+            fqn = "{}{}{}".format(getattr(scope_ctx, _FQN_NAME), _DLMTR_FQN, name)
+            candidates = self.symbols_by_fqn.get(fqn)
+            if candidates:
+                return self._select_related_element(name, idx, candidates)
+            scope_idx = getattr(scope_ctx, _IDX_PARENT_CTX_NAME)
+        candidates = self.symbols_by_fqn.get(name)
+        if candidates:
+            return self._select_related_element(name, idx, candidates)
+        # Fall back to the short name, which may be declared anywhere
+        short_name = name.split(_DLMTR_FQN)[-1]
+        candidates = self.symbols_by_name.get(short_name)
+        if candidates:
+            return self._select_related_element(name, idx, candidates)
         return None, None
 
+    def _get_redefined_element_name_idx(self, name, idx, idx_parent):
+        """Resolves the feature redefined by a redefinition. The feature is
+        first looked up in the general types of the owning element, following
+        its chain of specializations, and then like any other related element.
+
+        Args:
+            name (str): The name of the redefined feature.
+            idx (int): Index of the redefining element.
+            idx_parent (int): Index of the owner of the redefining element.
+
+        Returns:
+            tuple: Tagged name and index of the redefined feature, or
+                (None, None) if the name is unknown or ambiguous.
+        """
+        if name is not None and idx_parent is not None:
+            name = name.strip()
+            visited = set()
+            idx_general = getattr(
+                self.element_ctxs[idx_parent][1], _IDX_RELATED_CTX_NAME
+            )
+            while idx_general is not None and idx_general not in visited:
+                visited.add(idx_general)
+                general_ctx = self.element_ctxs[idx_general][1]
+                fqn = "{}{}{}".format(
+                    getattr(general_ctx, _FQN_NAME), _DLMTR_FQN, name
+                )
+                candidates = self.symbols_by_fqn.get(fqn)
+                if candidates:
+                    return self._select_related_element(name, idx, candidates)
+                idx_general = getattr(general_ctx, _IDX_RELATED_CTX_NAME)
+        return self._get_related_element_name_idx(name, idx, idx_parent)
+
+    def _select_related_element(self, name, idx, candidates):
+        """Returns the tagged name and index of the single candidate. Multiple
+        candidates are reported as an ambiguous reference and not resolved.
+        """
+        if len(candidates) > 1:
+            self.ambiguous_references.append((idx, name, list(candidates)))
+            warnings.warn(
+                "Ambiguous reference to '{}' from element {}, candidates: {}".format(
+                    name, idx, candidates
+                )
+            )
+            return None, None
+        ctx = self.element_ctxs[candidates[0]][1]
+        return getattr(ctx, _ELMNT_ID_CTX_NAME), candidates[0]
+
     # Visit a parse tree produced by SysML2Parser#sysml2_package.
     def visitSysml2_package(self, ctx: SysML2Parser.Sysml2_packageContext):
         setattr(ctx, _SYSML2_TYPE_NAME, _SML2_KWS.KW_PACKAGE.value)
@@ -611,6 +995,13 @@ class ModelTreeSysML2Visitor(SysML2Visitor):
     # Visit a parse tree produced by SysML2Parser#import_package.
     def visitImport_package(self, ctx: SysML2Parser.Import_packageContext):
         setattr(ctx, _SYSML2_TYPE_NAME, _SML2_KWS.KW_IMPORT.value)
+        self.imports.append(
+            (
+                self.element_count,
+                _DLMTR_FQN.join(self._get_ID(ctx)),
+                ctx.getText().endswith("*;"),
+            )
+        )
         self._model_table_builder(ctx)
         return self.visitChildren(ctx)
 
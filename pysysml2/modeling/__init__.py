@@ -1,2 +1,3 @@
-from .model import Model
+from .model import ExportError, Model, register_element_type
 from .element import Element, Relationship
+from .workspace import Workspace
@@ -0,0 +1,68 @@
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import os
+from pathlib import Path
+
+
+# Module constants
+MODEL_FILE_PATTERN = "*.sysml2"
+
+
+def expand_model_paths(paths):
+    """Expands model file, directory and glob pattern arguments to a list of
+    unique model files, in argument order. Directories are searched
+    recursively for *.sysml2 files.
+
+    Args:
+        paths (list): Model files, directories and glob patterns.
+
+    Returns:
+        tuple: The resolved model files, and a (path, exception) tuple for
+            each argument that matches nothing.
+    """
+    model_files, errors, seen = [], [], set()
+    for arg in paths:
+        arg = os.fspath(arg)
+        if glob.has_magic(arg):
+            matches = [Path(p) for p in sorted(glob.glob(arg, recursive=True))]
+            matches = [p for p in matches if p.is_file()]
+        elif Path(arg).is_dir():
+            matches = sorted(Path(arg).rglob(MODEL_FILE_PATTERN))
+        elif Path(arg).is_file():
+            matches = [Path(arg)]
+        else:
+            errors.append((arg, FileNotFoundError("No such file or directory")))
+            continue
+        if not matches:
+            errors.append((arg, ValueError("No model files found")))
+        for path in matches:
+            path = path.resolve()
+            if path not in seen:
+                seen.add(path)
+                model_files.append(path)
+    return model_files, errors
+
+
+def map_jobs(fn, args, jobs=1):
+    """Calls fn(*a) for each a in args, in up to jobs worker processes.
+
+    Args:
+        fn (callable): The function, must be picklable for jobs > 1.
+        args (list): Argument tuples.
+        jobs (int, optional): Number of worker processes. 1 calls fn in this
+            process, 0 uses one process per CPU. Defaults to 1.
+
+    Raises:
+        ValueError: Negative number of jobs.
+
+    Returns:
+        list: The results, in argument order.
+    """
+    if jobs < 0:
+        raise ValueError("Number of jobs must be 0 or more, got {}".format(jobs))
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(args) <= 1:
+        return [fn(*a) for a in args]
+    # ANTLR's Python runtime is CPU bound, so use processes, not threads
+    with ProcessPoolExecutor(max_workers=min(jobs, len(args))) as executor:
+        return list(executor.map(fn, *zip(*args)))
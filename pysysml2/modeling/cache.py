@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import warnings
+
+from pysysml2 import __version__
+from pysysml2.grammar.distpy import SysML2Lexer as lexer_module
+from pysysml2.grammar.distpy import SysML2Parser as parser_module
+
+
+# Module constants
+CACHE_DIR_ENV = "PYSYSML2_CACHE_DIR"
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024  # bytes
+_CACHE_EXT = ".json"
+
+
+def default_cache_dir():
+    """Returns the default cache directory: $PYSYSML2_CACHE_DIR if set, else
+    pysysml2 under $XDG_CACHE_HOME or ~/.cache.
+    """
+    if os.environ.get(CACHE_DIR_ENV):
+        return Path(os.environ[CACHE_DIR_ENV])
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "pysysml2"
+
+
+def _grammar_fingerprint():
+    """Hash of the generated lexer and parser, so that regenerating the
+    grammar invalidates all cached models.
+    """
+    h = hashlib.sha256()
+    h.update(repr(lexer_module.serializedATN()).encode("ascii"))
+    h.update(repr(parser_module.serializedATN()).encode("ascii"))
+    return h.hexdigest()
+
+
+class ParseCache:
+    """Persistent cache of parsed models. Each entry is the model table
+    dictionary built by the visitor for one model file, keyed by a hash of
+    the file content, the package version and the grammar. Entries are
+    evicted least recently used first once the cache exceeds max_size bytes.
+    """
+
+    _grammar = None
+
+    def __init__(self, cache_dir=None, max_size=DEFAULT_MAX_SIZE):
+        """_summary_
+
+        Args:
+            cache_dir (str or Path, optional): The cache directory. Defaults
+                to default_cache_dir().
+            max_size (int, optional): Maximum total size of the cache in
+                bytes. Defaults to DEFAULT_MAX_SIZE.
+        """
+        self.cache_dir = (
+            Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        )
+        self.max_size = max_size
+
+    def key(self, data: bytes, **options):
+        """Returns the cache key of a model.
+
+        Args:
+            data (bytes): Content of the model file.
+            **options: Visitor options that change the model table, e.g.
+                id_strategy.
+
+        Returns:
+            str: The key, a hex digest.
+        """
+        if ParseCache._grammar is None:
+            ParseCache._grammar = _grammar_fingerprint()
+        h = hashlib.sha256()
+        h.update(__version__.encode("utf-8"))
+        h.update(ParseCache._grammar.encode("ascii"))
+        h.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        h.update(data)
+        return h.hexdigest()
+
+    def get(self, key):
+        """Returns the model table dictionary cached under key, or None on a
+        cache miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return {row["idx"]: row for row in rows}
+
+    def put(self, key, model_table_dict):
+        """Caches a model table dictionary under key, then evicts least
+        recently used entries until the cache fits in max_size. The cache is
+        best effort: if it can't be written, e.g. the cache directory is read
+        only, a warning is issued and nothing is cached.
+        """
+        path = self._path(key)
+        tmp_path = path.with_suffix(".{}.tmp".format(os.getpid()))
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(list(model_table_dict.values()), f)
+            # Atomic, so concurrent readers never see a partial entry
+            os.replace(tmp_path, path)
+        except OSError as e:
+            warnings.warn("Unable to write the parse cache: {}".format(e))
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return
+        self._evict()
+
+    def clear(self):
+        """Removes all cache entries."""
+        for path in self._entries():
+            path.unlink()
+
+    def _path(self, key):
+        return self.cache_dir / (key + _CACHE_EXT)
+
+    def _entries(self):
+        if not self.cache_dir.is_dir():
+            return []
+        return list(self.cache_dir.glob("*" + _CACHE_EXT))
+
+    def _evict(self):
+        entries = []
+        try:
+            paths = self._entries()
+        except OSError as e:
+            warnings.warn("Unable to evict parse cache entries: {}".format(e))
+            return
+        for path in paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_size:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
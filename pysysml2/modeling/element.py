@@ -18,6 +18,34 @@ class Archtypes(Enum):
 
 
 class _RootSyntacticElement(ABC, NodeMixin):
+    """Base class for all syntactic elements, including Element and
+    Relationship. Note that this class is not meant to be instantiated.
+
+    Element attributes are stored in slots, and sysml2_layer and archtype
+    are class level constants, as models can hold hundreds of thousands of
+    elements. NodeMixin does not declare __slots__, so its parent and
+    children are given slots here too; the instance __dict__ then stays
+    unallocated unless other attributes are set on an element.
+    """
+
+    __slots__ = ("name", "sysml2_type", "idx", "uuid", "idx_parent",
+                 "uuid_parent", "idx_related_element", "related_element_name",
+                 "value_types", "constants", "multiplicity", "context_type",
+                 "keywords", "fully_qualified_name",
+                 "fully_qualified_name_tagged", "tree_level", "element_text",
+                 "_NodeMixin__parent", "_NodeMixin__children")
+
+    # Set in child class definitions
+    sysml2_layer = None
+    archtype = None
+
+    # Keys of to_dict(), in order
+    _DICT_KEYS = ('sysml2_layer', 'archtype', 'sysml2_type', 'tree_level',
+                  'name', 'idx', 'uuid', 'parent', 'idx_parent', 'uuid_parent',
+                  'related_element_name', 'idx_related_element', 'multiplicity',
+                  'value_types', 'constants', 'context_type', 'keywords',
+                  'fully_qualified_name', 'fully_qualified_name_tagged',
+                  'element_text',)
 
     def __init__(self, name=None, parent=None,
                  sysml2_type=None,
@@ -37,11 +65,7 @@ class _RootSyntacticElement(ABC, NodeMixin):
                  tree_level=None, 
                  element_text=None):
         
-        """Base class for all syntactic elements, including Element and
-        Relationship. Note that this class is not meant to be instantiated.
-        """
         self.name = name
-        self.parent = parent
         self.sysml2_type = sysml2_type
         self.idx = idx
         self.uuid = uuid
@@ -58,11 +82,27 @@ class _RootSyntacticElement(ABC, NodeMixin):
         self.fully_qualified_name_tagged = fully_qualified_name_tagged
         self.tree_level = tree_level
         self.element_text = element_text
-        self.sysml2_layer = None # Set in child class definitions
-        self.archtype = None
+        # Attach last, so idx and uuid are available to the model index
+        self.parent = parent
+
+    def _post_attach(self, parent):
+        """Anytree hook. Registers this element, and its descendants, with
+        the index of the model it was attached to.
+        """
+        index_subtree = getattr(parent.root, "_index_subtree", None)
+        if index_subtree is not None:
+            index_subtree(self)
+
+    def _pre_detach(self, parent):
+        """Anytree hook. Removes this element, and its descendants, from the
+        index of the model it is about to be detached from.
+        """
+        unindex_subtree = getattr(parent.root, "_unindex_subtree", None)
+        if unindex_subtree is not None:
+            unindex_subtree(self)
     
     def to_JSON(self):
-        return json.dumps(self, default=lambda o: o.__dict__,
+        return json.dumps(self.to_dict(), default=lambda o: o.__dict__,
                           sort_keys=True, indent=4)
     
     def to_dict(self):
@@ -71,184 +111,94 @@ class _RootSyntacticElement(ABC, NodeMixin):
             _type_: _description_
         """
         dd = {}
-        for k in ['sysml2_layer', 'archtype', 'sysml2_type', 'tree_level',
-                  'name', 'idx', 'uuid', 'parent', 'idx_parent', 'uuid_parent',
-                  'related_element_name', 'idx_related_element', 'multiplicity',
-                  'value_types', 'constants', 'context_type', 'keywords', 
-                  'fully_qualified_name', 'fully_qualified_name_tagged',
-                  'element_text',]:
+        for k in self._DICT_KEYS:
             if k == 'parent':
-                dd[k] = getattr(self, '_NodeMixin__parent').name
+                parent = self.parent
+                dd[k] = parent.name if parent is not None else None
             else:
                 dd[k] = getattr(self, k)
         return dd
 
 
 class Element(_RootSyntacticElement, NodeMixin):
-
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(Element, self).__init__(name=name, parent=parent, **kwargs)
-        self.archtype = Archtypes.element.value
+    archtype = Archtypes.element.value
 
 
 class Relationship(_RootSyntacticElement, NodeMixin):
-
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(Relationship, self).__init__(name=name, parent=parent, **kwargs)
-        self.archtype = Archtypes.relationship.value
+    archtype = Archtypes.relationship.value
 
 
 class Attribute(Element, NodeMixin):
+    sysml2_layer = ArchitectureLayers.systems_element.value
 
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(Attribute, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.systems_element.value
-        
 
 class Comment(Element, NodeMixin):
+    sysml2_layer = ArchitectureLayers.root_syntactic_element.value
 
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(Comment, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.root_syntactic_element.value
-        
 
 class Connection(Element, NodeMixin):
+    sysml2_layer = ArchitectureLayers.systems_element.value
 
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(Connection, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.systems_element.value
-        
 
 class ConnectionEndPart(Element, NodeMixin):
-
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(ConnectionEndPart, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.systems_element.value
+    sysml2_layer = ArchitectureLayers.systems_element.value
 
 
 class Doc(Element, NodeMixin):
-
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(Doc, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.root_syntactic_element.value
+    sysml2_layer = ArchitectureLayers.root_syntactic_element.value
 
 
 class Import(Element, NodeMixin):
-
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(Import, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.root_syntactic_element.value
+    sysml2_layer = ArchitectureLayers.root_syntactic_element.value
 
 
 class Item(Element, NodeMixin):
-
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(Item, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.systems_element.value
+    sysml2_layer = ArchitectureLayers.systems_element.value
 
 
 class Include(Element, NodeMixin):
-
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(Include, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.systems_element.value
+    sysml2_layer = ArchitectureLayers.systems_element.value
 
 
 class Objective(Element, NodeMixin):
-
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(Objective, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.systems_element.value
+    sysml2_layer = ArchitectureLayers.systems_element.value
 
 
 class Package(Element, NodeMixin):
+    sysml2_layer = ArchitectureLayers.kernel_element.value
 
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(Package, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.kernel_element.value
-        
 
 class Part(Element, NodeMixin):
+    sysml2_layer = ArchitectureLayers.systems_element.value
 
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(Part, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.systems_element.value
-        
 
 class Port(Element, NodeMixin):
-
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(Port, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.systems_element.value
+    sysml2_layer = ArchitectureLayers.systems_element.value
 
 
 class UseCase(Element, NodeMixin):
+    sysml2_layer = ArchitectureLayers.systems_element.value
 
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(UseCase, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.systems_element.value
 
-        
-        
 class RelationshipConnect(Relationship, NodeMixin):
+    sysml2_layer = ArchitectureLayers.root_syntactic_element.value
 
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(RelationshipConnect, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.root_syntactic_element.value
 
-        
-        
 class RelationshipRedefines(Relationship, NodeMixin):
+    sysml2_layer = ArchitectureLayers.root_syntactic_element.value
 
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(RelationshipRedefines, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.root_syntactic_element.value
-        
-        
-class RelationshipSpecializes(Relationship, NodeMixin):
 
-    def __init__(self, name=None, parent=None, **kwargs):
-        
-        super(RelationshipSpecializes, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.root_syntactic_element.value
+class RelationshipSpecializes(Relationship, NodeMixin):
+    sysml2_layer = ArchitectureLayers.root_syntactic_element.value
 
 
 class RelationshipMessage(Relationship, NodeMixin):
-
-    def __init__(self, name=None, parent=None, **kwargs):
-
-        super(RelationshipMessage, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.systems_element.value
+    sysml2_layer = ArchitectureLayers.systems_element.value
 
 
 class EnumDef(Element, NodeMixin):
-
-    def __init__(self, name=None, parent=None, **kwargs):
-
-        super(EnumDef, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.systems_element.value
+    sysml2_layer = ArchitectureLayers.systems_element.value
 
 
 class EnumValue(Element, NodeMixin):
-
-    def __init__(self, name=None, parent=None, **kwargs):
-
-        super(EnumValue, self).__init__(name=name, parent=parent, **kwargs)
-        self.sysml2_layer = ArchitectureLayers.systems_element.value
\ No newline at end of file
+    sysml2_layer = ArchitectureLayers.systems_element.value
@@ -1,10 +1,20 @@
+from array import array
+import codecs
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import io
+import json
+import mmap
+from operator import attrgetter
 import os
 from pathlib import Path
+import sqlite3
+import struct
+import sys
 
-from anytree import RenderTree, NodeMixin
-from anytree.exporter import DotExporter, JsonExporter
+from anytree import PreOrderIter, NodeMixin
+from anytree.render import ContStyle
 import antlr4
-import pandas as pd
 
 from pysysml2.modeling.element import (
     Attribute,
@@ -27,8 +37,11 @@ from pysysml2.modeling.element import (
     RelationshipConnect,
     RelationshipRedefines,
     RelationshipSpecializes,
-    RelationshipMessage
+    RelationshipMessage,
+    _RootSyntacticElement,
 )
+from pysysml2.modeling.cache import ParseCache
+from pysysml2.grammar import antlr4_helper
 from pysysml2.grammar import sysml2_model_visitor as smv
 from pysysml2.grammar.distpy.SysML2Lexer import SysML2Lexer
 from pysysml2.grammar.distpy.SysML2Parser import SysML2Parser
@@ -37,6 +50,711 @@ from pysysml2.grammar.distpy.SysML2Parser import SysML2Parser
 # Module constants
 # ROOT_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), "../"))
 NODE_ROOT_NAME = "root"
+# Parser prediction modes: full LL, or SLL first with fallback to LL
+PARSE_MODES = ("ll", "sll")
+# Indent of the JSON export
+_JSON_INDENT = 2
+_JSON_CHILDREN = "PySysML2_CHILDREN"
+_JSON_CHILDREN_FIELD = '"children": ' + json.dumps(_JSON_CHILDREN)
+# Element fields exported to JSON
+_JSON_KEYS = tuple(k for k in _RootSyntacticElement._DICT_KEYS if k != "parent")
+
+_KWS = smv._SML2_KWS
+# Element classes by sysml2_type
+_ELEMENT_TYPES = {
+    _KWS.KW_MESSAGE.value: RelationshipMessage,
+    _KWS.KW_ATTRIBUTE.value: Attribute,
+    _KWS.KW_COMMENT.value: Comment,
+    _KWS.KW_CONNECTION.value: Connection,
+    _KWS.KW_END.value + _KWS.KW_PART.value: ConnectionEndPart,
+    _KWS.KW_DOC.value: Doc,
+    _KWS.KW_IMPORT.value: Import,
+    _KWS.KW_ITEM.value: Item,
+    _KWS.KW_OBJECTIVE.value: Objective,
+    _KWS.KW_PACKAGE.value: Package,
+    _KWS.KW_PART.value: Part,
+    _KWS.KW_PORT.value: Port,
+    _KWS.KW_INCLUDE.value: Include,
+    _KWS.KW_USE.value + _KWS.KW_CASE.value: UseCase,
+    _KWS.KW_ENUM.value: EnumDef,
+    "enum_value": EnumValue,
+}
+# Element classes by keyword. A keyword match takes precedence over the
+# sysml2_type, and keywords registered first take precedence over later ones.
+_ELEMENT_KEYWORDS = {
+    _KWS.KW_CONNECT.value: RelationshipConnect,
+    _KWS.KW_SPECIALIZES.value: RelationshipSpecializes,
+    _KWS.KW_REDEFINES.value: RelationshipRedefines,
+}
+_NOT_IMPLEMENTED_TYPES = (_KWS.KW_ABOUT.value, _KWS.KW_ACTOR.value)
+# Resolved element classes by (sysml2_type, keywords)
+_element_class_cache = {}
+
+
+def _check_parse_mode(parse_mode):
+    """Raises ValueError for an unknown parse mode."""
+    if parse_mode not in PARSE_MODES:
+        raise ValueError(
+            "Unknown parse mode '{}', expected one of: {}".format(
+                parse_mode, ", ".join(PARSE_MODES)
+            )
+        )
+
+
+def _issue_ids(model_table_dict, id_strategy):
+    """Issues new element IDs to the rows of a cached model table, in visit
+    order like the visitor, and updates the IDs of their parents. Random IDs
+    must not be replayed from the cache, as models with the same content
+    would then share them.
+    """
+    next_id = smv.id_generator(id_strategy)
+    uuids = {}
+    for idx in sorted(model_table_dict):
+        row = model_table_dict[idx]
+        row["uuid"] = uuids[idx] = next_id(
+            idx, row["fully_qualified_name"], row["fully_qualified_name_tagged"]
+        )
+        if row["idx_parent"] is not None:
+            row["uuid_parent"] = uuids[row["idx_parent"]]
+
+
+def _parse_sysml2(input, parse_mode="ll"):
+    """Parses a SysML2 model.
+
+    Args:
+        input (InputStream): The lexer input, see
+            antlr4_helper.code_point_stream.
+        parse_mode (str, optional): See Model.from_sysml2_file. Defaults to
+            "ll".
+
+    Returns:
+        SysML2Parser.ModelContext: The parse tree.
+    """
+    # Create the lexer and parser
+    # Note, this is all Antler4 generated code
+    lexer = SysML2Lexer(input)
+    commonTokenStream = antlr4.CommonTokenStream(lexer)
+    sysml2Parser = SysML2Parser(commonTokenStream)
+    if parse_mode == "sll":
+        return antlr4_helper.parse_sll_first(sysml2Parser, "model")
+    return sysml2Parser.model()
+
+
+def register_element_type(cls, sysml2_type=None, keyword=None):
+    """Registers the element class built for model table rows with the given
+    sysml2_type, or with the given keyword among their keywords. Replaces any
+    class previously registered for the same sysml2_type or keyword.
+
+    Args:
+        cls (type): The element class, a subclass of Element or Relationship.
+        sysml2_type (str, optional): The sysml2_type of the rows.
+        keyword (str, optional): A keyword of the rows. Keyword matches take
+            precedence over sysml2_type matches.
+
+    Raises:
+        ValueError: Neither sysml2_type nor keyword is given.
+    """
+    if sysml2_type is None and keyword is None:
+        raise ValueError("A sysml2_type or a keyword is required")
+    if sysml2_type is not None:
+        _ELEMENT_TYPES[sysml2_type] = cls
+    if keyword is not None:
+        _ELEMENT_KEYWORDS[keyword] = cls
+    _element_class_cache.clear()
+
+
+def _resolve_element_class(sysml2_type, keywords):
+    """Returns the element class for a model table row, resolved from the
+    registries on first use of a (sysml2_type, keywords) combination.
+    """
+    key = (sysml2_type, tuple(keywords))
+    cls = _element_class_cache.get(key)
+    if cls is not None:
+        return cls
+    for keyword, cls in _ELEMENT_KEYWORDS.items():
+        if keyword in keywords:
+            break
+    else:
+        cls = _ELEMENT_TYPES.get(sysml2_type)
+    if cls is None:
+        if sysml2_type in _NOT_IMPLEMENTED_TYPES:
+            raise NotImplementedError("{} keyword not implemented".format(sysml2_type))
+        raise Exception("Unknown root sysml2 type: {}".format(sysml2_type))
+    _element_class_cache[key] = cls
+    return cls
+
+
+def _json_fields(flat, position):
+    """Returns the fields of an element of a flattened model exported to
+    JSON: the fields of to_dict(), except for the parent, or for position -1
+    the name and input file of the model. The visitor, and other objects,
+    are not exported.
+    """
+    if position < 0:
+        input_file = flat.model.input_file
+        return {
+            "name": flat.model.name,
+            "input_file": os.fspath(input_file) if input_file is not None else None,
+        }
+    fields = dict((k, flat.columns[k][position]) for k in _JSON_KEYS)
+    # Attributes set on an element outside of its slots
+    fields.update(
+        (k, v)
+        for k, v in flat.elements[position].__dict__.items()
+        if not k.startswith("_")
+    )
+    return fields
+
+
+def _write_json_tree(f, flat, position=-1, level=0):
+    """Writes the JSON document of the tree under the element at position of
+    a flattened model, or of the whole model for position -1, to the text
+    file f, one element at a time. The layout is the same as
+    json.dumps(tree, indent=2, sort_keys=True), with the children of a node
+    in its "children" field.
+    """
+    fields = _json_fields(flat, position)
+    children = flat.child_positions(position)
+    if children:
+        # Placeholder, replaced by the children as they are written
+        fields["children"] = _JSON_CHILDREN
+    text = json.dumps(fields, indent=_JSON_INDENT, sort_keys=True)
+    if level:
+        text = text.replace("\n", "\n" + _json_pad(level))
+    if not children:
+        f.write(text)
+        return
+    # Keys are unique, and string values have no raw newlines, so this
+    # only matches the placeholder field of this node
+    pad = "\n" + _json_pad(level + 1)
+    head, tail = text.split(pad + _JSON_CHILDREN_FIELD, 1)
+    f.write(head)
+    f.write(pad + '"children": [')
+    for j, child in enumerate(children):
+        f.write("{}\n{}".format("," if j else "", _json_pad(level + 2)))
+        _write_json_tree(f, flat, child, level + 2)
+    f.write(pad + "]")
+    f.write(tail)
+
+
+def _json_pad(level):
+    return " " * (_JSON_INDENT * level)
+
+
+# Text export, in the default style of RenderTree
+_TXT_STYLE = ContStyle()
+
+
+def _txt_line(pre, flat, position):
+    if position < 0:
+        return "{}[{}]: \n".format(pre, NODE_ROOT_NAME)
+    return "{}[{}]: {}\n".format(
+        pre, flat.columns["idx"][position], flat.columns["name"][position]
+    )
+
+
+def _write_txt_tree(f, flat, position=-1, max_depth=None):
+    """Writes the text tree under the element at position of a flattened
+    model, or of the whole model for position -1, to the text file f, one
+    line at a time. Iterative, with a stack of the children being written at
+    each level, so that deep trees do not hit the recursion limit.
+    """
+    f.write(_txt_line("", flat, position))
+    stack = []
+    if max_depth is None or max_depth > 0:
+        stack.append((flat.child_positions(position), 0, ""))
+    while stack:
+        children, i, fill = stack[-1]
+        if i == len(children):
+            stack.pop()
+            continue
+        stack[-1] = (children, i + 1, fill)
+        child = children[i]
+        last = i == len(children) - 1
+        pre = _TXT_STYLE.end if last else _TXT_STYLE.cont
+        f.write(_txt_line(fill + pre, flat, child))
+        if max_depth is None or len(stack) < max_depth:
+            grandchildren = flat.children[child]
+            if grandchildren:
+                indent = _TXT_STYLE.empty if last else _TXT_STYLE.vertical
+                stack.append((grandchildren, 0, fill + indent))
+
+
+# Excel export. The columns are the to_dict keys of the elements, the sheet
+# name is the default of the previous pandas based export.
+_EXCEL_COLUMNS = _RootSyntacticElement._DICT_KEYS
+_EXCEL_SHEET = "Sheet1"
+
+
+def _excel_rows(flat):
+    """Returns the Excel rows of the elements of a flattened model, with
+    lists written as text.
+    """
+    for row in zip(*(flat.columns[k] for k in _EXCEL_COLUMNS)):
+        yield [str(v) if isinstance(v, list) else v for v in row]
+
+
+def _excel_sheet_title(sysml2_type):
+    """Returns a valid sheet title for the elements of a sysml2_type."""
+    for c in "[]:*?/\\":
+        sysml2_type = sysml2_type.replace(c, "_")
+    return sysml2_type[:31]
+
+
+# SQLite export schema. Elements are stored with the model table columns, in
+# tree order, with the list valued columns as JSON. The edges of the tree and
+# the relationships between elements are also stored as edge tables.
+_SQLITE_SCHEMA = """
+CREATE TABLE model (
+    name TEXT,
+    input_file TEXT
+);
+CREATE TABLE elements (
+    idx INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT,
+    sysml2_type TEXT,
+    sysml2_layer TEXT,
+    archtype TEXT,
+    uuid TEXT,
+    idx_parent INTEGER,
+    uuid_parent TEXT,
+    idx_related_element INTEGER,
+    related_element_name TEXT,
+    value_types TEXT,
+    constants TEXT,
+    multiplicity TEXT,
+    context_type TEXT,
+    keywords TEXT,
+    fully_qualified_name TEXT,
+    fully_qualified_name_tagged TEXT,
+    tree_level INTEGER,
+    element_text TEXT
+);
+CREATE TABLE parent_edges (
+    idx INTEGER PRIMARY KEY REFERENCES elements (idx),
+    idx_parent INTEGER REFERENCES elements (idx)
+);
+CREATE TABLE relationship_edges (
+    idx INTEGER REFERENCES elements (idx),
+    idx_related_element INTEGER REFERENCES elements (idx),
+    kind TEXT
+);
+CREATE INDEX elements_uuid ON elements (uuid);
+CREATE INDEX elements_fqn ON elements (fully_qualified_name);
+CREATE INDEX elements_sysml2_type ON elements (sysml2_type);
+CREATE INDEX elements_idx_parent ON elements (idx_parent);
+CREATE INDEX parent_edges_idx_parent ON parent_edges (idx_parent);
+CREATE INDEX relationship_edges_idx ON relationship_edges (idx);
+CREATE INDEX relationship_edges_related ON relationship_edges (idx_related_element);
+"""
+# Element columns of the SQLite export stored as JSON
+_SQLITE_JSON_COLUMNS = ("related_element_name", "constants", "keywords")
+_SQLITE_COLUMNS = (
+    "idx", "position", "name", "sysml2_type", "sysml2_layer", "archtype",
+    "uuid", "idx_parent", "uuid_parent", "idx_related_element",
+    "related_element_name", "value_types", "constants", "multiplicity",
+    "context_type", "keywords", "fully_qualified_name",
+    "fully_qualified_name_tagged", "tree_level", "element_text",
+)
+
+
+# DOT export. Packages are drawn as clusters, and the ownership of the other
+# elements as edges from their owner. connect and message elements are drawn
+# as edges between the elements they relate, and elements related to another
+# element, e.g. by specializes, with an edge to that element.
+_DOT_EDGE_TYPES = ("connect", "message")
+_DOT_NODE_SHAPES = {
+    "comment": "note",
+    "doc": "note",
+    "import": "folder",
+    "package": "tab",
+    "port": "cds",
+}
+_DOT_EDGE_ATTRS = {
+    "owner": 'dir=back, arrowtail=diamond, color="gray40"',
+    "specializes": "arrowhead=empty",
+    "connect": 'dir=none, color="blue", penwidth=2',
+    "message": 'style=dashed, arrowhead=vee, color="darkgreen"',
+}
+# Edges of other relationships, e.g. redefines
+_DOT_RELATED_EDGE_ATTRS = "style=dashed, arrowhead=open"
+# unflatten settings used by Model.to_png: stagger leaf edges over 3 ranks,
+# and chain disconnected nodes by 5
+_DOT_UNFLATTEN = dict(stagger=3, fanout=True, chain=5)
+
+
+def _dot_escape(s):
+    return str(s).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _dot_label(sysml2_type, name):
+    """Node label of an element: its type, and its name without the idx tag.
+    """
+    return '"\u00ab{}\u00bb\\n{}"'.format(
+        _dot_escape(sysml2_type), _dot_escape(name.rsplit("@", 1)[0])
+    )
+
+
+def _dot_endpoints(related_element_name):
+    """Returns the endpoint names of a connect or message element, from its
+    related_element_name, keyed by their role, e.g.
+    {"Source": "a.b", "Target": "c"}.
+    """
+    endpoints = {}
+    for item in related_element_name or ():
+        if item is not None and ": " in item:
+            role, name = item.split(": ", 1)
+            endpoints[role] = name
+    return endpoints
+
+
+def _resolve_name(fqns, namespace, name):
+    """Returns the position of the element that a name refers to in a
+    namespace, given by its fully qualified name or None for the model, or
+    None. The name is looked up in the namespace, then in each enclosing
+    namespace. Feature chains, like a.b, resolve to their longest prefix that
+    names an element.
+    """
+    segments = name.replace(".", "::").split("::")
+    outer = namespace.split("::") if namespace else []
+    for n in range(len(segments), 0, -1):
+        for i in range(len(outer), -1, -1):
+            position = fqns.get("::".join(outer[:i] + segments[:n]))
+            if position is not None:
+                return position
+    return None
+
+
+def _write_dot(f, flat, sysml2_types=None, max_depth=None, cluster_packages=True):
+    """Writes the DOT graph of a flattened model to the text file f, one
+    statement at a time. See Model.to_dot.
+    """
+    types, idxs, names = (flat.columns[k] for k in ("sysml2_type", "idx", "name"))
+    related = flat.columns["idx_related_element"]
+    f.write("digraph model {\n")
+    f.write('    graph [fontname="Helvetica", compound=true];\n')
+    f.write('    node [shape=box, fontname="Helvetica"];\n')
+    f.write('    edge [fontname="Helvetica"];\n')
+    drawn = set()
+    edges = []
+    relations = []
+    # Pending elements, as (position, depth, owner idx, indent), or the
+    # closing brace of a cluster, as (None, indent)
+    stack = [(p, 1, None, "    ") for p in reversed(flat.roots)]
+    while stack:
+        item = stack.pop()
+        position, pad = item[0], item[-1]
+        if position is None:
+            f.write(pad + "}\n")
+            continue
+        depth, owner = item[1], item[2]
+        if max_depth is not None and depth > max_depth:
+            continue
+        sysml2_type, idx = types[position], idxs[position]
+        shown = sysml2_types is None or sysml2_type in sysml2_types
+        if sysml2_type in _DOT_EDGE_TYPES:
+            if shown:
+                relations.append(position)
+            continue
+        child_pad = pad
+        if not shown:
+            # Children of hidden elements are drawn as owned by their closest
+            # drawn owner
+            child_owner = owner
+        elif cluster_packages and sysml2_type == "package":
+            f.write("{}subgraph cluster_{} {{\n".format(pad, idx))
+            label = _dot_label(sysml2_type, names[position])
+            f.write("{}    label={};\n".format(pad, label))
+            stack.append((None, pad))
+            child_owner, child_pad = None, pad + "    "
+        else:
+            shape = _DOT_NODE_SHAPES.get(sysml2_type)
+            f.write(
+                "{}e{} [label={}{}];\n".format(
+                    pad,
+                    idx,
+                    _dot_label(sysml2_type, names[position]),
+                    "" if shape is None else ", shape=" + shape,
+                )
+            )
+            drawn.add(idx)
+            if owner is not None:
+                edges.append((owner, idx, _DOT_EDGE_ATTRS["owner"]))
+            if related[position] is not None:
+                relations.append(position)
+            child_owner = idx
+        for child in reversed(flat.children[position]):
+            stack.append((child, depth + 1, child_owner, child_pad))
+
+    fqns = None
+    for position in relations:
+        sysml2_type = types[position]
+        if sysml2_type not in _DOT_EDGE_TYPES:
+            attrs = _DOT_EDGE_ATTRS.get(sysml2_type, _DOT_RELATED_EDGE_ATTRS)
+            edges.append((idxs[position], related[position], attrs))
+            continue
+        if fqns is None:
+            fqns = dict(
+                (fqn, p) for p, fqn in enumerate(flat.columns["fully_qualified_name"])
+            )
+        endpoints = _dot_endpoints(flat.columns["related_element_name"][position])
+        attrs = _DOT_EDGE_ATTRS[sysml2_type]
+        if sysml2_type == "message":
+            tail, head = endpoints.get("From"), endpoints.get("To")
+            if endpoints.get("Of") is not None:
+                attrs += ', label="{}"'.format(_dot_escape(endpoints["Of"]))
+        else:
+            tail, head = endpoints.get("Source"), endpoints.get("Target")
+        if tail is None or head is None:
+            continue
+        parent = flat.parents[position]
+        namespace = None if parent < 0 else flat.columns["fully_qualified_name"][parent]
+        tail = _resolve_name(fqns, namespace, tail)
+        head = _resolve_name(fqns, namespace, head)
+        if tail is not None and head is not None:
+            edges.append((idxs[tail], idxs[head], attrs))
+    # Edges between drawn elements only
+    for tail, head, attrs in edges:
+        if tail in drawn and head in drawn:
+            f.write("    e{} -> e{} [{}];\n".format(tail, head, attrs))
+    f.write("}\n")
+
+
+# Binary snapshot format, see Model.save_snapshot. A header, then sections
+# each prefixed with their byte length: the string table, as UTF-8 strings
+# joined by NUL, then the model and element columns as little endian int32
+# arrays, with the elements in tree order.
+_SNAPSHOT_EXT = ".snapshot"
+_SNAPSHOT_MAGIC = b"PYSYSML2SNAP"
+_SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<12sHI")  # magic, version, element count
+_SNAPSHOT_LENGTH = struct.Struct("<Q")
+# Integer columns, with None stored as -1
+_SNAPSHOT_INT_COLUMNS = ("idx", "idx_parent", "idx_related_element", "tree_level")
+# String columns, stored as positions in the string table, None as -1
+_SNAPSHOT_STR_COLUMNS = (
+    "name", "sysml2_type", "uuid", "uuid_parent", "multiplicity",
+    "value_types", "context_type", "fully_qualified_name",
+    "fully_qualified_name_tagged", "element_text",
+)
+# List of strings columns, stored as the list lengths, -1 for None and -2 for
+# a single string rather than a list, and the string table positions of the
+# items of all lists
+_SNAPSHOT_LIST_COLUMNS = ("related_element_name", "constants", "keywords")
+# String table, model name and input file, tree parent positions, columns
+_SNAPSHOT_SECTIONS = (
+    3
+    + len(_SNAPSHOT_INT_COLUMNS)
+    + len(_SNAPSHOT_STR_COLUMNS)
+    + 2 * len(_SNAPSHOT_LIST_COLUMNS)
+)
+
+
+def _pack_ints(values):
+    a = array("i", values)
+    if sys.byteorder == "big":
+        a.byteswap()
+    return a.tobytes()
+
+
+def _unpack_ints(data, count):
+    a = array("i")
+    a.frombytes(data)
+    if sys.byteorder == "big":
+        a.byteswap()
+    if len(a) != count:
+        raise ValueError("Corrupt model snapshot")
+    return a.tolist()
+
+
+def _snapshot_sections(buf):
+    """Returns the sections of a snapshot, after checking its header.
+
+    Args:
+        buf (bytes or mmap): The snapshot.
+
+    Raises:
+        ValueError: Not a snapshot, unsupported version or corrupt snapshot.
+
+    Returns:
+        tuple: The element count, and the list of sections as bytes.
+    """
+    if len(buf) < _SNAPSHOT_HEADER.size:
+        raise ValueError("Not a PySysML2 model snapshot")
+    magic, version, count = _SNAPSHOT_HEADER.unpack_from(buf, 0)
+    if magic != _SNAPSHOT_MAGIC:
+        raise ValueError("Not a PySysML2 model snapshot")
+    if version != _SNAPSHOT_VERSION:
+        raise ValueError(
+            "Unsupported model snapshot version {}, expected {}".format(
+                version, _SNAPSHOT_VERSION
+            )
+        )
+    sections = []
+    offset = _SNAPSHOT_HEADER.size
+    while offset < len(buf):
+        if offset + _SNAPSHOT_LENGTH.size > len(buf):
+            raise ValueError("Corrupt model snapshot")
+        (size,) = _SNAPSHOT_LENGTH.unpack_from(buf, offset)
+        offset += _SNAPSHOT_LENGTH.size
+        if offset + size > len(buf):
+            raise ValueError("Corrupt model snapshot")
+        sections.append(buf[offset : offset + size])
+        offset += size
+    if len(sections) != _SNAPSHOT_SECTIONS:
+        raise ValueError("Corrupt model snapshot")
+    return count, sections
+
+
+def _import_pyarrow():
+    """Imports pyarrow, an optional dependency of the Arrow and Parquet
+    exports.
+    """
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Arrow and Parquet export requires the pyarrow package: "
+            "pip install pyarrow"
+        ) from e
+    return pyarrow
+
+
+def _arrow_schema(pa):
+    """Returns the Arrow schema of the element table: the fields of
+    Element.to_dict(), with the low cardinality strings dictionary encoded
+    and the list valued fields as lists.
+    """
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ("sysml2_layer", category),
+            ("archtype", category),
+            ("sysml2_type", category),
+            ("tree_level", pa.int32()),
+            ("name", pa.string()),
+            ("idx", pa.int64()),
+            ("uuid", pa.string()),
+            ("parent", pa.string()),
+            ("idx_parent", pa.int64()),
+            ("uuid_parent", pa.string()),
+            ("related_element_name", pa.list_(pa.string())),
+            ("idx_related_element", pa.int64()),
+            ("multiplicity", pa.string()),
+            ("value_types", pa.string()),
+            ("constants", pa.list_(pa.string())),
+            ("context_type", category),
+            ("keywords", pa.list_(category)),
+            ("fully_qualified_name", pa.string()),
+            ("fully_qualified_name_tagged", pa.string()),
+            ("element_text", pa.string()),
+        ]
+    )
+
+
+# Exports of Model.export, by format
+_EXPORTERS = {
+    "json": lambda model, out_dir, file: model.to_JSON(out_dir, file),
+    "ndjson": lambda model, out_dir, file: model.to_JSON(out_dir, file, ndjson=True),
+    "txt": lambda model, out_dir, file: model.to_txt(out_dir, file),
+    "csv": lambda model, out_dir, file: model.to_csv(out_dir, file),
+    "xlsx": lambda model, out_dir, file: model.to_excel(out_dir, file),
+    "excel": lambda model, out_dir, file: model.to_excel(out_dir, file),
+    "parquet": lambda model, out_dir, file: model.to_parquet(out_dir, file),
+    "sqlite": lambda model, out_dir, file: model.to_sqlite(out_dir, file),
+    "snapshot": lambda model, out_dir, file: model.save_snapshot(out_dir, file),
+    "dot": lambda model, out_dir, file: model.to_dot(out_dir, file),
+    "png": lambda model, out_dir, file: model.to_png(out_dir, file),
+}
+EXPORT_FORMATS = tuple(_EXPORTERS)
+
+
+class ExportError(Exception):
+    """Raised by Model.export once all formats are exported, if some of
+    them failed.
+
+    Attributes:
+        errors (dict): The error of each failed format, by format.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(
+            "; ".join(
+                "{}: {}: {}".format(fmt, type(e).__name__, e)
+                for fmt, e in errors.items()
+            )
+        )
+
+
+class _FlatColumns(dict):
+    """The columns of a _FlatModel: a list of values per Element.to_dict()
+    field, with the name of the parent in the parent column. Each column is
+    built on first use.
+    """
+
+    def __init__(self, flat):
+        super().__init__()
+        self._flat = flat
+
+    def __missing__(self, k):
+        flat = self._flat
+        if k == "parent":
+            names = self["name"]
+            column = [flat.model.name if p < 0 else names[p] for p in flat.parents]
+        elif k in _RootSyntacticElement._DICT_KEYS:
+            column = list(map(attrgetter(k), flat.elements))
+        else:
+            raise KeyError(k)
+        self[k] = column
+        return column
+
+
+class _FlatModel:
+    """The elements of a model flattened in tree order, with their fields as
+    columns. Built by a single walk of the model tree, and shared by the
+    exports in Model.exporting(). Given a node, only the subtree of the node
+    is walked, and the node is the only top level element.
+
+    Attributes:
+        model (Model): The model.
+        elements (list): The elements, in tree order.
+        parents (list): The position of the parent of each element, -1 for
+            top level elements.
+        children (list): The positions of the children of each element.
+        roots (list): The positions of the top level elements.
+        columns (_FlatColumns): The fields of the elements, by name.
+        model_table_df (DataFrame): The model table, built on first use by
+            Model.model_table_df.
+    """
+
+    def __init__(self, model, node=None):
+        self.model = model
+        self.elements, self.parents, self.children, self.roots = [], [], [], []
+        top = model.children if node is None else (node,)
+        stack = [(e, -1) for e in reversed(top)]
+        while stack:
+            element, parent = stack.pop()
+            position = len(self.elements)
+            self.elements.append(element)
+            self.parents.append(parent)
+            self.children.append([])
+            self.child_positions(parent).append(position)
+            children = element.children
+            if children:
+                stack.extend([(child, position) for child in reversed(children)])
+        self.columns = _FlatColumns(self)
+        self.model_table_df = None
+
+    def __len__(self):
+        return len(self.elements)
+
+    def child_positions(self, position):
+        """Returns the positions of the children of the element at position,
+        or of the top level elements for position -1.
+        """
+        return self.roots if position < 0 else self.children[position]
 
 
 class Model(NodeMixin):
@@ -49,10 +767,27 @@ class Model(NodeMixin):
         self.name = NODE_ROOT_NAME
         self.input_file = None
         self.sysml2_visitor = None
+        # Lookup tables of the elements attached to this model, maintained by
+        # the element attach/detach hooks.
+        self._idx_index = {}
+        self._uuid_index = {}
+        # Flattened model shared by the exports in exporting()
+        self._flat = None
 
-    def from_sysml2_file(self, file):
+    def from_sysml2_file(
+        self,
+        file,
+        intern_names=False,
+        id_strategy="uuid4",
+        parse_mode="ll",
+        cache=None,
+        single_pass=False,
+        encoding="utf-8",
+    ):
         """_summary_
         This function is used to read in a SysML2 file and create a model.
+        The file is read as bytes, which are lexed in place, see
+        from_sysml2_string.
         TODO: Consider integrating this with the antlr4 visitor. The only reason
         why this is separate is to keep antlr4 code abstracted from the rest of
         PySysML2. For now, I import antlr4 into this, but antlr4 related code
@@ -60,8 +795,31 @@ class Model(NodeMixin):
         loop is essentially executed twice-- but readibility makes it worth it.
         Args:
             file (_type_): _description_
+            intern_names (bool, optional): Intern element names and fully
+                qualified names while visiting. Defaults to False.
+            id_strategy (str or callable, optional): How element UUIDs are
+                generated: "uuid4" (random), "uuid5" (derived from the fully
+                qualified name), "sequential", or a callable. See
+                ModelTreeSysML2Visitor. Defaults to "uuid4".
+            parse_mode (str, optional): "ll" parses with full LL prediction.
+                "sll" first tries the much faster SLL prediction, and only
+                falls back to LL if that fails. Both give the same model.
+                Defaults to "ll".
+            cache (ParseCache or bool, optional): Cache of parsed models. On
+                a cache hit the model is built from the cached model table,
+                skipping ANTLR entirely, and sysml2_visitor is None. True
+                uses a ParseCache in the default cache directory. Models
+                using a callable id_strategy are not cached, and uuid4 IDs
+                are issued anew on a hit. Defaults to None.
+            single_pass (bool, optional): Build the model tree while the
+                visitor runs, instead of from the model table afterwards. The
+                model table is then only built if it is used, e.g. by to_csv.
+                Defaults to False.
+            encoding (str, optional): Encoding of the file. Defaults to
+                "utf-8".
 
         Raises:
+            ValueError: Unknown parse mode.
             NotImplementedError: _description_
             NotImplementedError: _description_
             NotImplementedError: _description_
@@ -70,22 +828,151 @@ class Model(NodeMixin):
         Returns:
             _type_: _description_
         """
-        # Read in the file
-        self.input_file = file
-        input = antlr4.FileStream(self.input_file)
-        # Create the lexer and parser
-        # Note, this is all Antler4 generated code
-        lexer = SysML2Lexer(input)
-        commonTokenStream = antlr4.CommonTokenStream(lexer)
-        sysml2Parser = SysML2Parser(commonTokenStream)
-        tree = sysml2Parser.model()
+        with open(file, "rb") as f:
+            return self.from_sysml2_stream(
+                f,
+                input_file=file,
+                encoding=encoding,
+                intern_names=intern_names,
+                id_strategy=id_strategy,
+                parse_mode=parse_mode,
+                cache=cache,
+                single_pass=single_pass,
+            )
+
+    def from_sysml2_stream(self, stream, input_file=None, encoding="utf-8", **kwargs):
+        """Reads a SysML2 model from a file-like object, e.g. a message body
+        or a database blob, and creates a model.
+
+        Args:
+            stream (file-like or mmap): The model text. Text streams are read
+                as str, binary streams as bytes in the given encoding. A
+                memory map is lexed in place, without reading it, and the
+                tokens of the parse tree kept by sysml2_visitor read their
+                text from it: the mapped file must not be changed while the
+                model is in use, as reading a truncated map crashes the
+                process.
+            input_file (str or Path, optional): Input file name of the model,
+                used to name export files. Defaults to the name of the
+                stream, if it has one.
+            encoding (str, optional): Encoding of a binary stream. Defaults
+                to "utf-8".
+            **kwargs: intern_names, id_strategy, parse_mode, cache and
+                single_pass, see from_sysml2_file.
+
+        Returns:
+            Model: self
+        """
+        if input_file is None and isinstance(getattr(stream, "name", None), str):
+            input_file = stream.name
+        data = stream if isinstance(stream, mmap.mmap) else stream.read()
+        return self.from_sysml2_string(data, input_file, encoding, **kwargs)
+
+    def from_sysml2_string(
+        self,
+        data,
+        input_file=None,
+        encoding="utf-8",
+        intern_names=False,
+        id_strategy="uuid4",
+        parse_mode="ll",
+        cache=None,
+        single_pass=False,
+    ):
+        """Parses a SysML2 model from memory, without a temporary file.
+        ASCII models in bytes-like data are lexed in place, without decoding
+        them to a str, and other models without the per character list of
+        antlr4.InputStream, see antlr4_helper.code_point_stream.
+
+        Args:
+            data (str or bytes-like): The model text, or the encoded model
+                text, e.g. bytes, bytearray, memoryview or mmap. A mapped file
+                must not be changed while the model is in use, see
+                from_sysml2_stream.
+            input_file (str or Path, optional): Input file name of the model,
+                used to name export files. Defaults to None.
+            encoding (str, optional): Encoding of bytes-like data. Defaults
+                to "utf-8".
+            intern_names, id_strategy, parse_mode, cache, single_pass: See
+                from_sysml2_file.
+
+        Raises:
+            ValueError: Unknown parse mode.
+            UnicodeDecodeError: The data is not valid in the encoding.
+
+        Returns:
+            Model: self
+        """
+        _check_parse_mode(parse_mode)
+        self.input_file = input_file
+        if cache is True:
+            cache = ParseCache()
+        if cache and not callable(id_strategy):
+            # Text is keyed by its UTF-8 encoding, like a file with the same
+            # content
+            key_options = dict(id_strategy=id_strategy)
+            if isinstance(data, str):
+                cache_key = cache.key(data.encode("utf-8"), **key_options)
+            else:
+                if codecs.lookup(encoding).name not in ("ascii", "utf-8"):
+                    key_options["encoding"] = codecs.lookup(encoding).name
+                cache_key = cache.key(data, **key_options)
+            model_table_dict = cache.get(cache_key)
+            if model_table_dict is not None:
+                if id_strategy == "uuid4":
+                    _issue_ids(model_table_dict, id_strategy)
+                self.sysml2_visitor = None
+                return self._build_tree(model_table_dict)
+        else:
+            cache = None
+        input = antlr4_helper.code_point_stream(
+            data,
+            encoding,
+            name="<string>" if input_file is None else os.fspath(input_file),
+        )
+        tree = _parse_sysml2(input, parse_mode)
         # Create the visitor class. This is a custom class that extends the
         # Antler4 generated visitor class with SysML2 specific functionality
-        self.sysml2_visitor = smv.ModelTreeSysML2Visitor()
+        self.sysml2_visitor = smv.ModelTreeSysML2Visitor(
+            intern_names=intern_names,
+            id_strategy=id_strategy,
+            element_builder=self._add_element if single_pass else None,
+        )
         modelCtx = self.sysml2_visitor.visit(tree) # Run visitor
+        if single_pass:
+            if cache is not None:
+                # Cached rows name their parent, like the visitor's rows
+                model_table_dict = {}
+                for idx, row in self.sysml2_visitor.model_table_dict.items():
+                    model_table_dict[idx] = dict(
+                        row,
+                        parent=row["parent"].name
+                        if row["idx_parent"] is not None
+                        else None,
+                    )
+                cache.put(cache_key, model_table_dict)
+            return self
         # This is a dictionary of all the elements in the model, created by the
         # visitor. This serves as the basis for creating the model tree
         model_table_dict = self.sysml2_visitor.model_table_dict
+        if cache is not None:
+            cache.put(cache_key, model_table_dict)
+        return self._build_tree(model_table_dict)
+
+    def _build_tree(self, model_table_dict):
+        """Builds the model tree from a model table dictionary, as created by
+        the visitor.
+
+        Args:
+            model_table_dict (dict): The model table dictionary.
+
+        Raises:
+            NotImplementedError: _description_
+            Exception: _description_
+
+        Returns:
+            Model: self
+        """
         # Each value is keyed by the idx of the element. The value is a
         # dictionary of the element's attributes. The value also contains the
         # idx of the parent element
@@ -95,98 +982,494 @@ class Model(NodeMixin):
             # Create the parent node. It the root node if it doesn't have a
             # parent node.
             v["parent"] = (
-                self
+                None
                 if v["idx_parent"] is None
                 else self.find_element_by_idx(v["idx_parent"])
             )
+            self._add_element(v)
 
-            # This case statement is used to create the correct type of element
-            # based on the sysml2_type attribute of the element. When a new 
-            # element is constructed, it is added to the model tree as a child
-            # of its parent node.Note that the dictionary of attributes for each
-            # element are the constructor arguments for the Element class.
-            if smv._SML2_KWS.KW_CONNECT.value in v["keywords"]:
-                RelationshipConnect(**v)
-            elif smv._SML2_KWS.KW_SPECIALIZES.value in v["keywords"]:
-                RelationshipSpecializes(**v)
-            elif smv._SML2_KWS.KW_REDEFINES.value in v["keywords"]:
-                RelationshipRedefines(**v)
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_MESSAGE.value:
-                RelationshipMessage(**v)
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_ABOUT.value:
-                raise NotImplementedError(
-                    "{} keyword not implemented".format(smv._SML2_KWS.KW_ABOUT.value)
-                )
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_ACTOR.value:
-                raise NotImplementedError(
-                    "{} keyword not implemented".format(smv._SML2_KWS.KW_ACTOR.value)
-                )
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_ATTRIBUTE.value:
-                Attribute(**v)
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_COMMENT.value:
-                Comment(**v)
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_CONNECTION.value:
-                Connection(**v)
-            elif v["sysml2_type"] == "{}{}".format(smv._SML2_KWS.KW_END.value, smv._SML2_KWS.KW_PART.value):
-                ConnectionEndPart(**v)
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_DOC.value:
-                Doc(**v)
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_IMPORT.value:
-                Import(**v)
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_ITEM.value:
-                Item(**v)
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_OBJECTIVE.value:
-                Objective(**v)
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_PACKAGE.value:
-                Package(**v)
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_PART.value:
-                Part(**v)
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_PORT.value:
-                Port(**v)
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_INCLUDE.value:
-                Include(**v)
-            elif v["sysml2_type"] == "{}{}".format(
-                smv._SML2_KWS.KW_USE.value, smv._SML2_KWS.KW_CASE.value
-            ):
-                UseCase(**v)
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_ENUM.value:
-                EnumDef(**v)
-            elif v["sysml2_type"] == "enum_value":
-                EnumValue(**v)
-            elif v["sysml2_type"] == smv._SML2_KWS.KW_ABOUT.value:
-                raise NotImplementedError(
-                    "{} keyword not implemented".format(smv._SML2_KWS.KW_ABOUT.value)
+        return self
+
+    def _add_element(self, row):
+        """Creates the element for a model table row, and adds it to the model
+        tree. Also the element builder of the visitor in single pass mode.
+
+        Args:
+            row (dict): The model table row. row["parent"] is the parent
+                element, or None for top level elements.
+
+        Returns:
+            Element: The new element.
+        """
+        if row["parent"] is None:
+            row["parent"] = self
+        # The element class is looked up from the sysml2_type and the
+        # keywords of the element. When a new element is constructed, it is
+        # added to the model tree as a child of its parent node. Note that
+        # the dictionary of attributes for each element are the
+        # constructor arguments for the Element class.
+        return _resolve_element_class(row["sysml2_type"], row["keywords"])(**row)
+
+    def from_sqlite(self, file):
+        """Loads a model written by to_sqlite. The model tree is rebuilt from
+        the database alone, without parsing, and sysml2_visitor is None.
+
+        Args:
+            file (str or Path): The SQLite database file.
+
+        Raises:
+            FileNotFoundError: The file does not exist.
+
+        Returns:
+            Model: self
+        """
+        if not os.path.isfile(file):
+            raise FileNotFoundError("No such SQLite model file: {}".format(file))
+        conn = sqlite3.connect(file)
+        try:
+            conn.row_factory = sqlite3.Row
+            (self.name, self.input_file) = conn.execute(
+                "SELECT name, input_file FROM model"
+            ).fetchone()
+            self.sysml2_visitor = None
+            rows = conn.execute(
+                "SELECT e.*, p.idx_parent AS tree_parent FROM elements e "
+                "JOIN parent_edges p ON p.idx = e.idx ORDER BY e.position"
+            )
+            for row in rows:
+                row = dict(row)
+                for k in _SQLITE_JSON_COLUMNS:
+                    row[k] = json.loads(row[k])
+                tree_parent = row.pop("tree_parent")
+                # Class level constants, and the tree order, are not element
+                # constructor arguments
+                for k in ("position", "sysml2_layer", "archtype"):
+                    del row[k]
+                row["parent"] = (
+                    None
+                    if tree_parent is None
+                    else self.find_element_by_idx(tree_parent)
                 )
-            else:
-                raise Exception("Unknown root sysml2 type: {}".format(v["sysml2_type"]))
+                self._add_element(row)
+        finally:
+            conn.close()
+        return self
+
+    def load_snapshot(self, file):
+        """Loads a model snapshot written by save_snapshot. The snapshot is
+        memory mapped and its columns are read in bulk, then the model tree
+        is rebuilt without parsing, and sysml2_visitor is None.
+
+        Args:
+            file (str or Path): The snapshot file.
+
+        Raises:
+            FileNotFoundError: The file does not exist.
+            ValueError: The file is not a snapshot, or has an unsupported
+                format version.
 
+        Returns:
+            Model: self
+        """
+        with open(file, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("Not a PySysML2 model snapshot")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                count, sections = _snapshot_sections(buf)
+        sections = iter(sections)
+        strings = next(sections).decode("utf-8").split("\0")
+        name, input_file = _unpack_ints(next(sections), 2)
+        self.name = strings[name]
+        self.input_file = None if input_file < 0 else strings[input_file]
+        self.sysml2_visitor = None
+        tree_parents = _unpack_ints(next(sections), count)
+        columns = {}
+        for k in _SNAPSHOT_INT_COLUMNS:
+            columns[k] = [
+                None if v < 0 else v for v in _unpack_ints(next(sections), count)
+            ]
+        for k in _SNAPSHOT_STR_COLUMNS:
+            columns[k] = [
+                None if i < 0 else strings[i]
+                for i in _unpack_ints(next(sections), count)
+            ]
+        for k in _SNAPSHOT_LIST_COLUMNS:
+            lengths = _unpack_ints(next(sections), count)
+            items = next(sections)
+            items = [
+                None if i < 0 else strings[i]
+                for i in _unpack_ints(items, len(items) // 4)
+            ]
+            values, start = [], 0
+            for n in lengths:
+                if n == -1:
+                    values.append(None)
+                elif n == -2:
+                    values.append(items[start])
+                    start += 1
+                else:
+                    values.append(items[start : start + n])
+                    start += n
+            columns[k] = values
+
+        # The snapshot is a valid tree in tree order, so the elements are
+        # linked to their parents directly, and indexed, rather than through
+        # the anytree parent setter, whose loop checks and root lookups would
+        # dominate the load time. NodeMixin keeps the links in the slots
+        # declared by _RootSyntacticElement.
+        if getattr(self, "_NodeMixin__children", None) is None:
+            self._NodeMixin__children = []
+        model_children = self._NodeMixin__children
+        children = [None] * count
+        keys = tuple(columns)
+        elements = []
+        for tree_parent, values in zip(tree_parents, zip(*columns.values())):
+            row = dict(zip(keys, values))
+            e = _resolve_element_class(row["sysml2_type"], row["keywords"])(**row)
+            if tree_parent < 0:
+                e._NodeMixin__parent = self
+                model_children.append(e)
+            else:
+                e._NodeMixin__parent = elements[tree_parent]
+                if children[tree_parent] is None:
+                    children[tree_parent] = []
+                    elements[tree_parent]._NodeMixin__children = children[
+                        tree_parent
+                    ]
+                children[tree_parent].append(e)
+            if e.idx is not None:
+                self._idx_index[e.idx] = e
+            if e.uuid is not None:
+                self._uuid_index[e.uuid] = e
+            elements.append(e)
         return self
 
     def find_element_by_idx(self, idx: int):
-        """_summary_
+        """Returns the element with the given idx, or None if there is no such
+        element in the model.
 
         Args:
-            idx (int): _description_
+            idx (int): The element index assigned by the visitor.
         """
-        # Find the node that has the idx
-        for pre, fill, node in RenderTree(self):
-            if isinstance(node, Model):
-                continue
-            if getattr(node, "idx") == idx:
-                return node
-        return None
-
-    def to_excel(self, out_dir=None, file=None):
-        """_summary_
+        return self._idx_index.get(idx)
+
+    def find_element_by_uuid(self, uuid: str):
+        """Returns the element with the given UUID, or None if there is no
+        such element in the model.
+
+        Args:
+            uuid (str): The element UUID assigned by the visitor.
+        """
+        return self._uuid_index.get(uuid)
+
+    @property
+    def model_table_df(self):
+        """The model table of the elements in the model, as a DataFrame with
+        explicit dtypes, see smv.build_model_table_df.
+
+        The table is built from the current elements on each access, so it
+        reflects edits of their attributes; keep a reference to reuse it. In
+        exporting(), the model must not be modified, and a single table is
+        shared by all accesses.
+        """
+        flat = self._flatten()
+        if flat.model_table_df is None:
+            parents = [self if p < 0 else flat.elements[p] for p in flat.parents]
+            columns = dict(
+                (k, parents if k == "parent" else flat.columns[k])
+                for k in smv.MODEL_TABLE_COLUMNS
+            )
+            flat.model_table_df = smv._typed_model_table_df(
+                columns, flat.columns["idx"]
+            )
+        return flat.model_table_df
+
+    def _flatten(self):
+        """Returns the flattened model shared by the exports in exporting(),
+        or else a new one.
+        """
+        return self._flat if self._flat is not None else _FlatModel(self)
+
+    @contextmanager
+    def exporting(self):
+        """Context manager, in which all exports share a single flattening of
+        the model into a table, instead of each walking the model tree. The
+        model must not be modified in the context.
+        """
+        if self._flat is not None:
+            yield self
+            return
+        self._flat = _FlatModel(self)
+        try:
+            yield self
+        finally:
+            self._flat = None
+
+    def export(self, formats, out_dir=None, file=None, threads=1):
+        """Exports the model to several formats. The model is flattened once,
+        and shared by the exports of all formats, see exporting(). A failed
+        export doesn't stop the others, the errors of all failed exports are
+        raised once they are done.
+
+        Args:
+            formats (Iterable[str]): The formats, from EXPORT_FORMATS.
+            out_dir (_type_, optional): _description_. Defaults to None.
+            file (_type_, optional): _description_. Defaults to None.
+            threads (int, optional): Number of formats to export
+                concurrently, in threads. Defaults to 1.
+
+        Raises:
+            ValueError: Unknown format.
+            ExportError: Some formats failed, see ExportError.errors.
+        """
+        formats = [fmt.lower() for fmt in formats]
+        for fmt in formats:
+            if fmt not in _EXPORTERS:
+                raise ValueError(
+                    "Unknown format '{}', expected one of: {}".format(
+                        fmt, ", ".join(EXPORT_FORMATS)
+                    )
+                )
+        errors = {}
+        with self.exporting():
+            if threads <= 1 or len(formats) <= 1:
+                for fmt in formats:
+                    try:
+                        _EXPORTERS[fmt](self, out_dir, file)
+                    except Exception as e:
+                        errors[fmt] = e
+            else:
+                with ThreadPoolExecutor(max_workers=threads) as executor:
+                    futures = [
+                        (fmt, executor.submit(_EXPORTERS[fmt], self, out_dir, file))
+                        for fmt in formats
+                    ]
+                for fmt, future in futures:
+                    if future.exception() is not None:
+                        errors[fmt] = future.exception()
+        if errors:
+            raise ExportError(errors)
+
+    def _index_subtree(self, node):
+        """Adds node and all of its descendants to the model indices. Called
+        when an element is attached somewhere below this model.
+
+        Args:
+            node (_type_): The element that was attached.
+        """
+        for n in PreOrderIter(node):
+            if n.idx is not None:
+                self._idx_index[n.idx] = n
+            if n.uuid is not None:
+                self._uuid_index[n.uuid] = n
+
+    def _unindex_subtree(self, node):
+        """Removes node and all of its descendants from the model indices.
+        Called before an element is detached from below this model.
+
+        Args:
+            node (_type_): The element that is being detached.
+        """
+        for n in PreOrderIter(node):
+            if self._idx_index.get(n.idx) is n:
+                del self._idx_index[n.idx]
+            if self._uuid_index.get(n.uuid) is n:
+                del self._uuid_index[n.uuid]
+
+    def to_excel(self, out_dir=None, file=None, sheet_per_type=False):
+        """Writes the model to an Excel workbook, one row per element in tree
+        order, with the to_dict fields of the element as columns. The rows are
+        streamed to a write-only openpyxl workbook.
 
         Args:
             out_dir (_type_, optional): _description_. Defaults to None.
             file (_type_, optional): _description_. Defaults to None.
+            sheet_per_type (bool, optional): Write the elements of each
+                sysml2_type to a sheet named after the type, instead of all
+                elements to a single sheet. Defaults to False.
         """
         out_file = self._out_file_handler(".xlsx", out_dir, file)
-        dd = self.to_dict()
-        df = pd.DataFrame.from_dict(dd, orient="index")
-        df.to_excel(out_file, index=False)
+        # Imported here, as openpyxl is only used for Excel
+        import openpyxl
+
+        flat = self._flatten()
+        wb = openpyxl.Workbook(write_only=True)
+        sheets = {}
+        for sysml2_type, row in zip(flat.columns["sysml2_type"], _excel_rows(flat)):
+            title = _excel_sheet_title(sysml2_type) if sheet_per_type else _EXCEL_SHEET
+            ws = sheets.get(title)
+            if ws is None:
+                ws = sheets[title] = wb.create_sheet(title)
+                ws.append(_EXCEL_COLUMNS)
+            ws.append(row)
+        if not sheets:
+            wb.create_sheet(_EXCEL_SHEET).append(_EXCEL_COLUMNS)
+        wb.save(out_file)
+
+    def to_arrow(self):
+        """Returns the element table as a pyarrow Table, one row per element
+        in tree order, with the fields of Element.to_dict() as columns.
+        related_element_name is a list column: a single related element is
+        a list of one name. Requires the optional pyarrow package.
+
+        Raises:
+            ImportError: pyarrow is not installed.
+
+        Returns:
+            pyarrow.Table: The element table.
+        """
+        pa = _import_pyarrow()
+        schema = _arrow_schema(pa)
+        flat = self._flatten()
+        columns = dict((name, flat.columns[name]) for name in schema.names)
+        columns["related_element_name"] = [
+            [v] if isinstance(v, str) else v
+            for v in columns["related_element_name"]
+        ]
+        return pa.Table.from_pydict(columns, schema=schema)
+
+    def to_parquet(self, out_dir=None, file=None):
+        """Writes the element table of to_arrow() to a Parquet file.
+        Requires the optional pyarrow package.
+
+        Args:
+            out_dir (_type_): _description_
+        """
+        _import_pyarrow()
+        import pyarrow.parquet as pq
+
+        out_file = self._out_file_handler(".parquet", out_dir, file)
+        pq.write_table(self.to_arrow(), out_file, compression="zstd")
+
+    def to_sqlite(self, out_dir=None, file=None):
+        """Writes the model to a SQLite database, for querying large models
+        with SQL, and for fast reloading with from_sqlite. An existing file
+        is replaced. The database has the tables:
+
+        - model: the name and input file of the model.
+        - elements: a row per element with its fields, in tree order
+          (position). related_element_name, constants and keywords are JSON.
+          Indexed by idx, uuid, fully_qualified_name, sysml2_type and
+          idx_parent.
+        - parent_edges: (idx, idx_parent) of every element, from the model
+          tree. Top level elements have a NULL idx_parent.
+        - relationship_edges: (idx, idx_related_element, kind) of every
+          element related to another element, where kind is the sysml2_type
+          of the element, e.g. specializes or redefines.
+
+        Args:
+            out_dir (_type_): _description_
+        """
+        out_file = self._out_file_handler(".sqlite", out_dir, file)
+        if os.path.exists(out_file):
+            os.remove(out_file)
+        flat = self._flatten()
+        columns = dict(
+            (k, range(len(flat)) if k == "position" else flat.columns[k])
+            for k in _SQLITE_COLUMNS
+        )
+        for k in _SQLITE_JSON_COLUMNS:
+            columns[k] = [json.dumps(v) for v in columns[k]]
+        element_rows = zip(*(columns[k] for k in _SQLITE_COLUMNS))
+        idxs = flat.columns["idx"]
+        conn = sqlite3.connect(out_file)
+        try:
+            with conn:
+                conn.executescript(_SQLITE_SCHEMA)
+                conn.execute(
+                    "INSERT INTO model VALUES (?, ?)",
+                    (
+                        self.name,
+                        os.fspath(self.input_file)
+                        if self.input_file is not None
+                        else None,
+                    ),
+                )
+                conn.executemany(
+                    "INSERT INTO elements ({}) VALUES ({})".format(
+                        ", ".join(_SQLITE_COLUMNS),
+                        ", ".join("?" * len(_SQLITE_COLUMNS)),
+                    ),
+                    element_rows,
+                )
+                conn.executemany(
+                    "INSERT INTO parent_edges VALUES (?, ?)",
+                    (
+                        (idx, None if parent < 0 else idxs[parent])
+                        for idx, parent in zip(idxs, flat.parents)
+                    ),
+                )
+                conn.executemany(
+                    "INSERT INTO relationship_edges VALUES (?, ?, ?)",
+                    (
+                        row
+                        for row in zip(
+                            idxs,
+                            flat.columns["idx_related_element"],
+                            flat.columns["sysml2_type"],
+                        )
+                        if row[1] is not None
+                    ),
+                )
+        finally:
+            conn.close()
+
+    def save_snapshot(self, out_dir=None, file=None):
+        """Writes a binary snapshot of the model, for fast reloading with
+        load_snapshot, e.g. of precompiled models at service startup. The
+        snapshot has a format version header, a table of the distinct
+        strings of the model, and the element fields and tree parents as
+        integer columns, so it is loaded with bulk reads. The file is
+        replaced atomically.
+
+        Args:
+            out_dir (_type_): _description_
+
+        Raises:
+            ValueError: A string of the model contains a NUL character.
+        """
+        out_file = self._out_file_handler(_SNAPSHOT_EXT, out_dir, file)
+        flat = self._flatten()
+        strings = {}
+
+        def ref(s):
+            return -1 if s is None else strings.setdefault(s, len(strings))
+
+        input_file = None if self.input_file is None else os.fspath(self.input_file)
+        sections = [None, _pack_ints([ref(self.name), ref(input_file)])]
+        sections.append(_pack_ints(flat.parents))
+        for k in _SNAPSHOT_INT_COLUMNS:
+            values = flat.columns[k]
+            sections.append(_pack_ints(-1 if v is None else v for v in values))
+        for k in _SNAPSHOT_STR_COLUMNS:
+            sections.append(_pack_ints(map(ref, flat.columns[k])))
+        for k in _SNAPSHOT_LIST_COLUMNS:
+            lengths, items = [], []
+            for value in flat.columns[k]:
+                if value is None:
+                    lengths.append(-1)
+                elif isinstance(value, str):
+                    lengths.append(-2)
+                    items.append(ref(value))
+                else:
+                    lengths.append(len(value))
+                    items.extend(ref(s) for s in value)
+            sections.append(_pack_ints(lengths))
+            sections.append(_pack_ints(items))
+        string_table = "\0".join(strings)
+        if string_table.count("\0") != max(len(strings) - 1, 0):
+            raise ValueError("Model strings can not contain NUL characters")
+        sections[0] = string_table.encode("utf-8")
+
+        tmp_file = "{}.{}.tmp".format(out_file, os.getpid())
+        with open(tmp_file, "wb") as f:
+            f.write(
+                _SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, len(flat))
+            )
+            for section in sections:
+                f.write(_SNAPSHOT_LENGTH.pack(len(section)))
+                f.write(section)
+        os.replace(tmp_file, out_file)
 
     def to_csv(self, out_dir=None, file=None):
         """_summary_
@@ -197,93 +1480,160 @@ class Model(NodeMixin):
         # Create the output directory if it doesn't exist, set file name
         out_file = self._out_file_handler(".csv", out_dir, file)
         # Write to CSV from the pandas dataframe
-        df = self.sysml2_visitor.model_table_df
-        df.to_csv(out_file, index=False)
+        self.model_table_df.to_csv(out_file, index=False)
 
     def to_dict(self):
         """_summary_"""
-        dd = {}
-        for pre, fill, node in RenderTree(self):
-            if isinstance(node, Element) or isinstance(node, Relationship):
-                index = node.idx
-                vv = node.to_dict()
-                dd[index] = vv
-        return dd
-
-    def to_dot(self, out_dir=None, file=None):
-        """_summary_
+        flat = self._flatten()
+        keys = _RootSyntacticElement._DICT_KEYS
+        rows = zip(*(flat.columns[k] for k in keys))
+        return dict(
+            (idx, dict(zip(keys, row))) for idx, row in zip(flat.columns["idx"], rows)
+        )
+
+    def to_dot(
+        self,
+        out_dir=None,
+        file=None,
+        sysml2_types=None,
+        max_depth=None,
+        cluster_packages=True,
+    ):
+        """Writes the model graph to a Graphviz DOT file, one statement at a
+        time. Each element is a node, labeled with its type and name, with an
+        edge from the element that owns it. Packages are drawn as clusters of
+        the elements they own. connect and message elements are drawn as
+        edges between the elements they relate, and elements related to
+        another element, e.g. by specializes, have an edge to it.
 
         Args:
             out_dir (_type_): _description_
+            sysml2_types (Container[str], optional): Only draw the elements of
+                these sysml2_types. Defaults to None, all elements.
+            max_depth (int, optional): Only draw the elements up to this
+                number of levels below the model. Defaults to None, all
+                levels.
+            cluster_packages (bool, optional): Draw packages as clusters. If
+                False, they are drawn as nodes, like the other elements.
+                Defaults to True.
         """
         # Create the output directory if it doesn't exist, set file name
         out_file = self._out_file_handler(".dot", out_dir, file)
         # Write the dot file
-        DotExporter(self).to_dotfile(out_file)
+        with open(out_file, "w", encoding="utf-8") as f:
+            _write_dot(f, self._flatten(), sysml2_types, max_depth, cluster_packages)
 
-    def to_JSON(self, out_dir=None, file=None):
-        """_summary_
+    def to_JSON(self, out_dir=None, file=None, ndjson=False):
+        """Writes the model to a JSON file. The file is written incrementally
+        while walking the tree, so the document is never held in memory.
+        Elements are written with the fields of Element.to_dict(), nested in
+        the "children" of their parent, and laid out like json.dumps with
+        indent=2 and sorted keys.
 
         Args:
             out_dir (_type_): _description_
+            ndjson (bool, optional): Write newline delimited JSON instead, to
+                a .ndjson file: one line per element, in tree order, with the
+                name of its parent in the "parent" field. Defaults to False.
         """
-
-        def for_non_serializable_obj(obj):
-            """Some objects in the model are not serializable. This function is
-            passed to the JsonExporter to handle these objects. It returns the
-            type of the object, which is recorded in the JSON. Note that the
-            contents of the object are lost. This occurs for the Antlr4 visitor
-            because it has a Stream object that is not serializable.
-
-            Note that I have passed the repr of the object to the JSON. This is
-            dangerous for complex objects, but works well for simple objects
-            like Python type.
-
-            TODO: Note this is a bit of a hack! It would be great to serailize
-            the visitor. Perhaps we can somehow ignore the Stream object? Not a
-            problem that needs to be solved right now, but should be addressed
-            before production use.
-            """
-            return repr(type(obj))
-
         # Create the output directory if it doesn't exist, set file name
-        out_file = self._out_file_handler(".json", out_dir, file)
-
-        # Write the JSON file
-        exporter = JsonExporter(
-            indent=2, sort_keys=True, default=for_non_serializable_obj
+        out_file = self._out_file_handler(
+            ".ndjson" if ndjson else ".json", out_dir, file
         )
-        data = exporter.export(self)
+        flat = self._flatten()
         with open(out_file, "w", encoding="utf-8") as outfile:
-            outfile.write(data)
+            if ndjson:
+                for position, parent in enumerate(flat.columns["parent"]):
+                    fields = _json_fields(flat, position)
+                    fields["parent"] = parent
+                    outfile.write(json.dumps(fields, sort_keys=True))
+                    outfile.write("\n")
+            else:
+                _write_json_tree(outfile, flat)
 
-    def to_png(self, out_dir=None, file=None):
-        """_summary_
-        Invokes the graphviz library to render the model to a PNG file.
-        TODO: Rewrite this so that we can use the unflatten GraphViz tool to
-        make better looking graphs. See StackOverflow question:
-        stackoverflow.com/questions/73262051/how-can-i-adjust-a-graphviz-render
+    def to_png(
+        self,
+        out_dir=None,
+        file=None,
+        layout="dot",
+        unflatten=False,
+        sysml2_types=None,
+        max_depth=None,
+        cluster_packages=True,
+    ):
+        """Renders the model graph of to_dot to a PNG file, with the Graphviz
+        command line tools.
 
-        Perhaps build a superclass of DotExporter?
         Args:
             out_dir (_type_): _description_
+            layout (str, optional): The Graphviz layout engine. "sfdp" lays
+                out models with thousands of elements much faster than "dot",
+                but does not draw clusters. Defaults to "dot".
+            unflatten (bool, optional): Preprocess the graph with the
+                Graphviz unflatten tool, which staggers the leaves of wide
+                trees, for a better aspect ratio. Defaults to False.
+            sysml2_types, max_depth, cluster_packages: See to_dot.
+
+        Raises:
+            graphviz.ExecutableNotFound: The Graphviz tools are not installed.
         """
+        # Imported here, as graphviz is only used for rendering
+        import graphviz
+
         # Create the output directory if it doesn't exist, set file name
         out_file = self._out_file_handler(".png", out_dir, file)
+        source = io.StringIO()
+        _write_dot(source, self._flatten(), sysml2_types, max_depth, cluster_packages)
+        source = source.getvalue()
+        if unflatten:
+            source = graphviz.unflatten(source, **_DOT_UNFLATTEN)
         # Write the image of the graph
-        DotExporter(self).to_picture(out_file)
+        png = graphviz.pipe(layout, "png", source.encode("utf-8"))
+        with open(out_file, "wb") as f:
+            f.write(png)
 
-    def to_txt(self, out_dir=None, file=None):
-        """_summary_
+    def to_txt(self, out_dir=None, file=None, node=None, max_depth=None):
+        """Writes the text tree of the model, see write_txt, to a text file.
 
         Args:
             out_dir (_type_): _description_
+            node (Element, optional): The root of the subtree to write.
+                Defaults to None, the whole model.
+            max_depth (int, optional): The number of levels below node to
+                write. Defaults to None, all levels.
         """
         # Create the output directory if it doesn't exist, set file name
         out_file = self._out_file_handler(".txt", out_dir, file)
         # Write the text file
         with open(out_file, "w", encoding="utf-8") as outfile:
-            outfile.write(str(self))
+            self.write_txt(outfile, node=node, max_depth=max_depth)
+
+    def write_txt(self, f, node=None, max_depth=None):
+        """Writes the text tree of the model, as returned by str(model), to a
+        text file handle, one line per element.
+
+        Args:
+            f (_type_): The text file handle.
+            node (Element, optional): The root of the subtree to write.
+                Defaults to None, the whole model.
+            max_depth (int, optional): The number of levels below node to
+                write, 0 only writes node. Defaults to None, all levels.
+
+        Raises:
+            ValueError: node is not in the model, or max_depth is negative.
+        """
+        if node is not None and node is not self and node.root is not self:
+            raise ValueError("{!r} is not in the model".format(node.name))
+        if max_depth is not None and max_depth < 0:
+            raise ValueError("max_depth must be 0 or more, got {}".format(max_depth))
+        if node is None or node is self:
+            flat, position = self._flatten(), -1
+        elif self._flat is not None:
+            flat, position = self._flat, self._flat.elements.index(node)
+        else:
+            # Only walk the subtree, rather than flattening the whole model
+            flat, position = _FlatModel(self, node), 0
+        _write_txt_tree(f, flat, position, max_depth)
 
     def _out_file_handler(self, ext, out_dir=None, file=None):
         """_summary_
@@ -295,6 +1645,8 @@ class Model(NodeMixin):
         out_dir = "." if out_dir is None else out_dir
         Path(out_dir).mkdir(parents=True, exist_ok=True)
         file = self.input_file if file is None else file
+        if file is None:
+            raise ValueError("No output file name, and the model has no input file")
         root = os.path.splitext(os.path.basename(file))[0]
         out_file = os.path.join(out_dir, root + ext)
         return out_file
@@ -305,14 +1657,6 @@ class Model(NodeMixin):
         Returns:
             _type_: _description_
         """
-        ss = ""
-        for pre, fill, node in RenderTree(self.root):
-
-            if isinstance(node, Model):
-
-                idx, name = NODE_ROOT_NAME, ""
-            else:
-                idx, name = node.idx, node.name
-
-            ss += "{}[{}]: {}\n".format(pre, idx, name)
-        return ss
+        ss = io.StringIO()
+        self.write_txt(ss)
+        return ss.getvalue()
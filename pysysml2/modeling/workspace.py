@@ -0,0 +1,361 @@
+from bisect import bisect_right
+import os
+from pathlib import Path
+import warnings
+
+from pysysml2.grammar import antlr4_helper
+from pysysml2.grammar import sysml2_model_visitor as smv
+from pysysml2.modeling.batch import expand_model_paths, map_jobs
+from pysysml2.modeling.model import Model, _check_parse_mode, _parse_sysml2
+
+
+# Module constants
+_DLMTR_FQN = smv._DLMTR_FQN
+_DLMTR_AT = smv._DLMTR_AT
+_KW_IMPORT = smv._SML2_KWS.KW_IMPORT.value
+_KW_REDEFINES = smv._SML2_KWS.KW_REDEFINES.value
+
+
+def _parse_file(file, parse_mode, encoding):
+    """Parses one model file. Runs in a worker process for parallel loads, so
+    only the visitor results are returned, not the parse tree.
+
+    Returns:
+        tuple: The model table dictionary, and the unresolved references,
+            ambiguous references and imports of the visitor.
+    """
+    input = antlr4_helper.code_point_stream(
+        Path(file).read_bytes(), encoding, name=os.fspath(file)
+    )
+    # Element IDs are issued again when the files are merged
+    visitor = smv.ModelTreeSysML2Visitor(id_strategy="sequential")
+    with warnings.catch_warnings():
+        # Ambiguous references are resolved again, and reported, by the
+        # workspace
+        warnings.simplefilter("ignore")
+        visitor.visit(_parse_sysml2(input, parse_mode))
+    return (
+        visitor.model_table_dict,
+        visitor.unresolved_references,
+        visitor.ambiguous_references,
+        visitor.imports,
+    )
+
+
+class Workspace:
+    """A set of SysML2 model files, loaded as one model. The files are parsed
+    independently, in parallel processes if requested, and then merged into
+    one model table. Elements are renumbered, so that their indices, tagged
+    names and UUIDs are unique in the workspace. References that can't be
+    resolved within their own file, e.g. imports, and specializations and
+    redefinitions of elements of other files, are then resolved against the
+    elements of all files.
+    """
+
+    def __init__(self):
+        """_summary_"""
+        self.files = []
+        self.model = None
+        # (idx, name) of the references that matched no element of the
+        # workspace, e.g. imports of the standard library
+        self.unresolved_references = []
+        # (idx, name, candidate idxs) of the references that matched more
+        # than one element of the workspace
+        self.ambiguous_references = []
+        # Index of the first element of each file
+        self._offsets = []
+        # Name of each reference the visitor left unresolved, or found
+        # ambiguous, by index of the referencing element
+        self._unresolved = {}
+        # (idx, namespace, wildcard) of the imports, by file position and
+        # index of the importing namespace
+        self._imports = {}
+        # Indices of the elements declaring each short and fully qualified
+        # name
+        self._symbols_by_name = {}
+        self._symbols_by_fqn = {}
+
+    def load(
+        self, paths, jobs=1, id_strategy="uuid4", parse_mode="ll", encoding="utf-8"
+    ):
+        """Loads model files, directories and glob patterns into the
+        workspace. Directories are searched recursively for *.sysml2 files.
+
+        Args:
+            paths (str, Path or list): Model files, directories and glob
+                patterns.
+            jobs (int, optional): Number of files to parse in parallel, in
+                separate processes. 0 uses one process per CPU. Defaults to 1.
+            id_strategy (str or callable, optional): How element UUIDs are
+                generated, see Model.from_sysml2_file. Defaults to "uuid4".
+            parse_mode (str, optional): See Model.from_sysml2_file. Defaults
+                to "ll".
+            encoding (str, optional): Encoding of the model files. Defaults
+                to "utf-8".
+
+        Raises:
+            FileNotFoundError: A path doesn't exist.
+            ValueError: A path matches no model files, or unknown parse mode
+                or ID strategy.
+
+        Returns:
+            Workspace: self
+        """
+        _check_parse_mode(parse_mode)
+        next_id = smv.id_generator(id_strategy)
+        if isinstance(paths, (str, os.PathLike)):
+            paths = [paths]
+        paths = list(paths)
+        self.files, errors = expand_model_paths(paths)
+        if errors:
+            path, error = errors[0]
+            raise type(error)("{}: '{}'".format(error, path))
+
+        args = [(file, parse_mode, encoding) for file in self.files]
+        results = map_jobs(_parse_file, args, jobs)
+
+        rows = self._merge(results, next_id)
+        self._resolve(rows)
+        self.model = Model()
+        # Exports of a single directory are named after it
+        if len(paths) == 1 and Path(paths[0]).is_dir():
+            self.model.input_file = paths[0]
+        self.model._build_tree(rows)
+        return self
+
+    def file_of(self, element):
+        """Returns the model file an element of the workspace model was
+        loaded from.
+
+        Args:
+            element (Element): The element.
+
+        Returns:
+            Path: The model file.
+        """
+        return self.files[bisect_right(self._offsets, element.idx) - 1]
+
+    def _merge(self, results, next_id):
+        """Merges the model tables of the files into one, renumbering their
+        elements, and builds the symbol table of the workspace.
+
+        Args:
+            results (list): The results of _parse_file, in file order.
+            next_id (callable): The element ID generator.
+
+        Returns:
+            dict: The merged model table dictionary.
+        """
+        rows = {}
+        self._offsets = []
+        self._unresolved = {}
+        self._imports = {}
+        self._symbols_by_name = {}
+        self._symbols_by_fqn = {}
+        for i, (model_table_dict, unresolved, ambiguous, imports) in enumerate(
+            results
+        ):
+            offset = len(rows)
+            self._offsets.append(offset)
+            for idx, row in model_table_dict.items():
+                # Generated names of unnamed elements include their index
+                if row["name"] == smv.tag_name(None, idx, row["idx_parent"]):
+                    name = None
+                else:
+                    name = row["name"].split(_DLMTR_AT)[0]
+                idx += offset
+                if row["idx_parent"] is None:
+                    idx_parent = parent = None
+                    name_tagged = smv.tag_name(name, idx, idx_parent)
+                    fqn, fqn_tagged = name_tagged.split(_DLMTR_AT)[0], name_tagged
+                else:
+                    idx_parent = row["idx_parent"] + offset
+                    parent = rows[idx_parent]
+                    name_tagged = smv.tag_name(name, idx, idx_parent)
+                    fqn = "{}{}{}".format(
+                        parent["fully_qualified_name"],
+                        _DLMTR_FQN,
+                        name_tagged.split(_DLMTR_AT)[0],
+                    )
+                    fqn_tagged = "{}{}{}".format(
+                        parent["fully_qualified_name_tagged"], _DLMTR_FQN, name_tagged
+                    )
+                idx_related_element = row["idx_related_element"]
+                related_element_name = row["related_element_name"]
+                if idx_related_element is not None:
+                    idx_related_element += offset
+                    related_element_name = rows[idx_related_element]["name"]
+                rows[idx] = row = dict(
+                    row,
+                    name=name_tagged,
+                    parent=None if parent is None else parent["name"],
+                    idx=idx,
+                    uuid=next_id(idx, fqn, fqn_tagged),
+                    idx_parent=idx_parent,
+                    uuid_parent=None if parent is None else parent["uuid"],
+                    idx_related_element=idx_related_element,
+                    related_element_name=related_element_name,
+                    fully_qualified_name=fqn,
+                    fully_qualified_name_tagged=fqn_tagged,
+                )
+                # Imports and redefinitions don't declare a new symbol, as in
+                # the visitor
+                if (
+                    name is not None
+                    and row["sysml2_type"] != _KW_IMPORT
+                    and _KW_REDEFINES not in row["keywords"]
+                ):
+                    self._symbols_by_name.setdefault(name, []).append(idx)
+                    self._symbols_by_fqn.setdefault(fqn, []).append(idx)
+            for idx, name in unresolved:
+                self._unresolved[idx + offset] = name
+            for idx, name, _ in ambiguous:
+                self._unresolved[idx + offset] = name
+            for idx, namespace, wildcard in imports:
+                idx += offset
+                key = (i, rows[idx]["idx_parent"])
+                self._imports.setdefault(key, []).append((idx, namespace, wildcard))
+        return rows
+
+    def _resolve(self, rows):
+        """Resolves the imports, and the references left unresolved or found
+        ambiguous by the visitor, against all elements of the workspace.
+        Imports are resolved first, as they are used to resolve the other
+        references, and redefinitions last, as they are looked up in the
+        general types of their owner.
+
+        Args:
+            rows (dict): The merged model table dictionary.
+        """
+        self.unresolved_references = []
+        self.ambiguous_references = []
+        for imports in self._imports.values():
+            for idx, namespace, _ in imports:
+                candidates = self._lookup(rows, namespace, idx, imports=False)
+                self._set_related_element(rows, idx, namespace, candidates)
+        resolved = set()
+        redefinitions = []
+        for idx, name in sorted(self._unresolved.items()):
+            if _KW_REDEFINES in rows[idx]["keywords"]:
+                redefinitions.append(idx)
+            elif self._set_related_element(
+                rows, idx, name, self._lookup(rows, name, idx)
+            ):
+                resolved.add(idx)
+        # Redefinitions whose owner now specializes an element of another file
+        redefinitions = sorted(
+            set(redefinitions).union(
+                idx
+                for idx, row in rows.items()
+                if row["idx_parent"] in resolved and _KW_REDEFINES in row["keywords"]
+            )
+        )
+        for idx in redefinitions:
+            name = rows[idx]["name"].split(_DLMTR_AT)[0]
+            candidates = self._lookup_redefined(rows, name, idx)
+            # Keep the feature found by the visitor, unless a single feature
+            # of the new general type is found
+            if rows[idx]["idx_related_element"] is None or len(candidates) == 1:
+                self._set_related_element(rows, idx, name, candidates)
+        self.unresolved_references.sort()
+        self.ambiguous_references.sort()
+
+    def _lookup(self, rows, name, idx, imports=True):
+        """Returns the elements a name referenced by an element may refer to.
+        The name is looked up as a fully qualified name in each enclosing
+        namespace, innermost first, and as a fully qualified name. Then, if
+        imports is True, in the namespaces imported into the enclosing
+        namespaces and the file, and last as a short name anywhere in the
+        workspace.
+
+        Args:
+            rows (dict): The merged model table dictionary.
+            name (str): The referenced name, may be qualified.
+            idx (int): Index of the referencing element.
+            imports (bool, optional): Look up imported and short names.
+                Defaults to True.
+
+        Returns:
+            list: Indices of the candidate elements.
+        """
+        scopes = []
+        scope = rows[idx]["idx_parent"]
+        while scope is not None:
+            scopes.append(scope)
+            scope = rows[scope]["idx_parent"]
+        for scope in scopes:
+            fqn = rows[scope]["fully_qualified_name"] + _DLMTR_FQN + name
+            candidates = self._candidates(self._symbols_by_fqn.get(fqn), idx)
+            if candidates:
+                return candidates
+        candidates = self._candidates(self._symbols_by_fqn.get(name), idx)
+        if candidates or not imports:
+            return candidates
+
+        i = bisect_right(self._offsets, idx) - 1
+        for scope in scopes + [None]:
+            for idx_import, namespace, wildcard in self._imports.get((i, scope), ()):
+                idx_namespace = rows[idx_import]["idx_related_element"]
+                if idx_namespace is not None:
+                    namespace = rows[idx_namespace]["fully_qualified_name"]
+                if wildcard:
+                    fqn = namespace + _DLMTR_FQN + name
+                else:
+                    # The last segment of the imported name is the one in scope
+                    last = namespace.split(_DLMTR_FQN)[-1]
+                    if name.split(_DLMTR_FQN)[0] != last:
+                        continue
+                    fqn = namespace + name[len(last) :]
+                for candidate in self._candidates(self._symbols_by_fqn.get(fqn), idx):
+                    if candidate not in candidates:
+                        candidates.append(candidate)
+        if candidates:
+            return candidates
+        short_name = name.split(_DLMTR_FQN)[-1]
+        return self._candidates(self._symbols_by_name.get(short_name), idx)
+
+    def _lookup_redefined(self, rows, name, idx):
+        """Returns the features a redefinition may redefine. The feature is
+        first looked up in the general types of the owning element, following
+        its chain of specializations, and then like any other name.
+        """
+        visited = set()
+        idx_parent = rows[idx]["idx_parent"]
+        idx_general = (
+            None if idx_parent is None else rows[idx_parent]["idx_related_element"]
+        )
+        while idx_general is not None and idx_general not in visited:
+            visited.add(idx_general)
+            fqn = rows[idx_general]["fully_qualified_name"] + _DLMTR_FQN + name
+            candidates = self._candidates(self._symbols_by_fqn.get(fqn), idx)
+            if candidates:
+                return candidates
+            idx_general = rows[idx_general]["idx_related_element"]
+        return self._lookup(rows, name, idx)
+
+    @staticmethod
+    def _candidates(idxs, idx):
+        # An element never refers to itself
+        return [i for i in idxs if i != idx] if idxs else []
+
+    def _set_related_element(self, rows, idx, name, candidates):
+        """Records the element a reference resolved to. References without a
+        single candidate are reported as unresolved or ambiguous.
+
+        Returns:
+            bool: True if the reference was resolved.
+        """
+        if not candidates:
+            self.unresolved_references.append((idx, name))
+            return False
+        if len(candidates) > 1:
+            self.ambiguous_references.append((idx, name, candidates))
+            warnings.warn(
+                "Ambiguous reference to '{}' from element {}, candidates: {}".format(
+                    name, idx, candidates
+                )
+            )
+            return False
+        rows[idx]["idx_related_element"] = candidates[0]
+        rows[idx]["related_element_name"] = rows[candidates[0]]["name"]
+        return True
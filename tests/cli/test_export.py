@@ -0,0 +1,174 @@
+import os
+from pathlib import Path
+import shutil
+import subprocess
+import sys
+
+import pytest
+from typer.testing import CliRunner
+
+from pysysml2.cli.__main__ import app
+
+ROOT_DIR = Path(__file__).parent.parent.parent
+MODELS_DIR = Path(__file__).parent.parent / "modeling" / "data" / "models"
+N_MODELS = len(list(MODELS_DIR.glob("*.sysml2")))
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def models_dir(tmp_path: Path):
+    models_dir = tmp_path / "models"
+    shutil.copytree(MODELS_DIR, models_dir / "nested")
+    return models_dir
+
+
+def export(*args):
+    return runner.invoke(app, ["export", *map(str, args), "--no-cache"])
+
+
+def test_export_single_file(models_dir: Path, tmp_path: Path):
+    out_dir = tmp_path / "out"
+    result = export(models_dir / "nested" / "model_1.sysml2", "-o", out_dir)
+
+    assert result.exit_code == 0, result.output
+    assert (out_dir / "model_1.json").exists()
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_export_batch(models_dir: Path, tmp_path: Path, jobs: int):
+    out_dir = tmp_path / "out"
+    result = export(
+        models_dir, "--format", "json,txt", "-o", out_dir, "--jobs", jobs
+    )
+
+    assert result.exit_code == 0, result.output
+    assert f"Exported {N_MODELS} of {N_MODELS} model file(s)." in result.output
+    for name in ("model_1", "model_2"):
+        assert (out_dir / f"{name}.json").exists()
+        assert (out_dir / f"{name}.txt").exists()
+
+
+def test_export_batch_glob_and_errors(models_dir: Path, tmp_path: Path):
+    bad_model = models_dir / "bad.sysml2"
+    # Comments about other elements are not implemented
+    bad_model.write_text("package A { comment about X /* Note */ }")
+    out_dir = tmp_path / "out"
+    result = export(
+        models_dir / "nested" / "*.sysml2",
+        bad_model,
+        models_dir / "missing.sysml2",
+        "-o",
+        out_dir,
+        "--jobs",
+        2,
+    )
+
+    # Failures are summarized, without aborting the other exports
+    assert result.exit_code == 1
+    assert f"Exported {N_MODELS} of {N_MODELS + 1} model file(s)." in result.output
+    assert "bad.sysml2" in result.output
+    assert "missing.sysml2: No such file or directory" in result.output
+    assert (out_dir / "model_1.json").exists()
+    assert (out_dir / "model_2.json").exists()
+
+
+def test_export_batch_output_name_collision(models_dir: Path, tmp_path: Path):
+    shutil.copy(models_dir / "nested" / "model_1.sysml2", models_dir)
+    result = export(models_dir, "-o", tmp_path / "out")
+
+    assert result.exit_code == 1
+    assert "Output file names collide" in result.output
+
+
+def test_export_json_does_not_import_pandas(tmp_path: Path):
+    # Run in a new process, as pandas may already be imported by other tests
+    code = (
+        "import sys\n"
+        "from typer.testing import CliRunner\n"
+        "from pysysml2.cli.__main__ import app\n"
+        "args = ['export', sys.argv[1], '-o', sys.argv[2], '--no-cache']\n"
+        "result = CliRunner().invoke(app, args)\n"
+        "assert result.exit_code == 0, result.output\n"
+        "assert 'pandas' not in sys.modules\n"
+    )
+    model_file = MODELS_DIR / "model_1.sysml2"
+    subprocess.run(
+        [sys.executable, "-c", code, str(model_file), str(tmp_path)],
+        check=True,
+        env=dict(os.environ, PYTHONPATH=str(ROOT_DIR)),
+    )
+
+
+def test_export_python_m(tmp_path: Path):
+    out_dir = tmp_path / "out"
+    subprocess.run(
+        [sys.executable, "-m", "pysysml2.cli", "export"]
+        + [str(MODELS_DIR / "model_1.sysml2"), "-o", str(out_dir), "--no-cache"],
+        check=True,
+        env=dict(os.environ, PYTHONPATH=str(ROOT_DIR)),
+    )
+
+    assert (out_dir / "model_1.json").exists()
+
+
+@pytest.mark.parametrize("threads", [1, 2])
+def test_export_all_formats(models_dir: Path, tmp_path: Path, threads: int):
+    out_dir = tmp_path / "out"
+    fmts = ["json", "ndjson", "txt", "csv", "sqlite", "snapshot", "dot"]
+    result = export(
+        models_dir / "nested" / "model_1.sysml2",
+        "--format",
+        ",".join(fmts),
+        "-o",
+        out_dir,
+        "--threads",
+        threads,
+    )
+
+    assert result.exit_code == 0, result.output
+    for ext in fmts:
+        assert (out_dir / f"model_1.{ext}").exists()
+
+
+@pytest.mark.skipif(shutil.which("dot") is not None, reason="dot is installed")
+def test_export_png_without_dot(models_dir: Path, tmp_path: Path):
+    out_dir = tmp_path / "out"
+    result = export(
+        models_dir / "nested" / "model_1.sysml2", "--format", "png,json", "-o", out_dir
+    )
+
+    # png is reported and skipped, the other formats are written
+    assert result.exit_code == 0, result.output
+    assert "Unable to export to png" in result.output
+    assert (out_dir / "model_1.json").exists()
+
+    # Other formats still fail the file
+    shutil.rmtree(out_dir)
+    (out_dir / "model_1.json").mkdir(parents=True)
+    result = export(
+        models_dir / "nested" / "model_1.sysml2", "--format", "png,json", "-o", out_dir
+    )
+    assert result.exit_code == 1
+    assert "Unable to export to png" in result.output
+    assert "ExportError: json: " in result.output
+
+
+def test_export_negative_jobs(tmp_path: Path):
+    result = export(MODELS_DIR / "model_1.sysml2", "-o", tmp_path, "--jobs", -1)
+
+    assert result.exit_code == 2
+    assert not (tmp_path / "model_1.json").exists()
+
+
+@pytest.mark.parametrize(
+    "option, value",
+    [("--format", "json,bogus"), ("--id-strategy", "bogus"), ("--parse-mode", "lr")],
+)
+def test_export_invalid_options(option: str, value: str, tmp_path: Path):
+    result = export(MODELS_DIR, "-o", tmp_path, option, value)
+
+    # Rejected before any model file is exported
+    assert result.exit_code == 2
+    assert "Unknown" in result.output
+    assert not list(tmp_path.iterdir())
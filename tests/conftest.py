@@ -14,3 +14,22 @@ def output_datadir(datadir: Path):
     output_dir = datadir / "__output__"
     os.makedirs(output_dir, exist_ok=True)
     return output_dir
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--runslow", action="store_true", default=False, help="Run slow tests."
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: slow test, run with --runslow.")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip_slow = pytest.mark.skip(reason="Slow test, run with --runslow.")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
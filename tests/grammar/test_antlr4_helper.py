@@ -1,7 +1,17 @@
+from pathlib import Path
+
+import antlr4
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorStrategy import DefaultErrorStrategy
+import pytest
+
+from pysysml2.grammar.distpy.SysML2Lexer import SysML2Lexer
 from pysysml2.grammar.distpy.SysML2Parser import SysML2Parser
 
 from pysysml2.grammar.antlr4_helper import (
     build_parser_context_names_enum,
+    code_point_stream,
+    parse_sll_first,
 )
 
 
@@ -11,3 +21,69 @@ def test_build_parser_context_names_enum():
     )
     for kw in parser_contexts:
         assert kw.name == kw.value
+
+
+MODELS_DIR = Path(__file__).parent.parent / "modeling" / "data" / "models"
+
+
+def _parser(text: str) -> SysML2Parser:
+    lexer = SysML2Lexer(antlr4.InputStream(text))
+    parser = SysML2Parser(antlr4.CommonTokenStream(lexer))
+    parser.removeErrorListeners()
+    return parser
+
+
+@pytest.mark.parametrize("model_name", ["model_1", "model_2"])
+def test_parse_sll_first(model_name: str):
+    text = (MODELS_DIR / f"{model_name}.sysml2").read_text()
+
+    ll_parser = _parser(text)
+    ll_tree = ll_parser.model()
+    sll_parser = _parser(text)
+    sll_tree = parse_sll_first(sll_parser, "model")
+
+    assert sll_tree.toStringTree(recog=sll_parser) == ll_tree.toStringTree(
+        recog=ll_parser
+    )
+    assert sll_parser.getNumberOfSyntaxErrors() == 0
+    assert sll_parser._interp.predictionMode == PredictionMode.LL
+    assert isinstance(sll_parser._errHandler, DefaultErrorStrategy)
+
+
+def test_parse_sll_first_falls_back_to_ll():
+    text = "package A { part def B; part def ; }"
+
+    ll_parser = _parser(text)
+    ll_tree = ll_parser.model()
+    sll_parser = _parser(text)
+    sll_tree = parse_sll_first(sll_parser, "model")
+
+    # The syntax error is reported and recovered from by the LL stage
+    assert sll_parser.getNumberOfSyntaxErrors() == ll_parser.getNumberOfSyntaxErrors()
+    assert sll_parser.getNumberOfSyntaxErrors() > 0
+    assert sll_tree.toStringTree(recog=sll_parser) == ll_tree.toStringTree(
+        recog=ll_parser
+    )
+
+
+def _tokens(stream):
+    token_stream = antlr4.CommonTokenStream(SysML2Lexer(stream))
+    token_stream.fill()
+    return [(t.type, t.start, t.stop, t.text) for t in token_stream.tokens]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        (MODELS_DIR / "model_1.sysml2").read_text(),
+        "package A {\n    doc /* Größe in µm */\n    part def B;\n}\n",
+    ],
+)
+def test_code_point_stream(text: str):
+    expect = _tokens(antlr4.InputStream(text))
+
+    assert _tokens(code_point_stream(text)) == expect
+    data = text.encode("utf-8")
+    for buffer in (data, bytearray(data), memoryview(data)):
+        assert _tokens(code_point_stream(buffer)) == expect
+    assert _tokens(code_point_stream(text.encode("utf-16"), "utf-16")) == expect
@@ -0,0 +1,271 @@
+import gc
+import sys
+import time
+import timeit
+
+import antlr4
+import pytest
+
+from pysysml2.grammar.distpy.SysML2Lexer import SysML2Lexer
+from pysysml2.grammar.distpy.SysML2Parser import SysML2Parser
+from pysysml2.grammar import sysml2_model_visitor as smv
+from pysysml2.grammar.sysml2_model_visitor import ModelTreeSysML2Visitor
+
+
+def visit_sysml2_text(text: str) -> ModelTreeSysML2Visitor:
+    return visit_sysml2_text_with(text)
+
+
+def visit_sysml2_text_with(text: str, **kwargs) -> ModelTreeSysML2Visitor:
+    lexer = SysML2Lexer(antlr4.InputStream(text))
+    parser = SysML2Parser(antlr4.CommonTokenStream(lexer))
+    visitor = ModelTreeSysML2Visitor(**kwargs)
+    visitor.visit(parser.model())
+    return visitor
+
+
+def find_row(visitor: ModelTreeSysML2Visitor, fqn: str):
+    rows = [
+        v
+        for v in visitor.model_table_dict.values()
+        if v["fully_qualified_name"] == fqn
+    ]
+    assert len(rows) == 1
+    return rows[0]
+
+
+def test_related_element_scope_aware_lookup():
+    visitor = visit_sysml2_text(
+        """
+        package A {
+            part def Board {}
+            package B {
+                part def Board {}
+                part def System {
+                    part board : Board;
+                }
+            }
+            part def Other {
+                part board : Board;
+            }
+        }
+        """
+    )
+    inner_board = find_row(visitor, "A::B::Board")
+    outer_board = find_row(visitor, "A::Board")
+
+    row = find_row(visitor, "A::B::System::board")
+    assert row["idx_related_element"] == inner_board["idx"]
+    assert row["related_element_name"] == inner_board["name"]
+
+    row = find_row(visitor, "A::Other::board")
+    assert row["idx_related_element"] == outer_board["idx"]
+    assert not visitor.ambiguous_references
+
+
+def test_redefines_resolved_through_specialization():
+    visitor = visit_sysml2_text(
+        """
+        package A {
+            part def Chip { attribute name : String; }
+            part def Battery { attribute name : String; }
+            part def AA specializes Battery {
+                attribute redefines name : String = "AA";
+            }
+        }
+        """
+    )
+    row = find_row(visitor, "A::AA::name")
+    assert row["idx_related_element"] == find_row(visitor, "A::Battery::name")["idx"]
+
+
+def test_related_element_ambiguous_reference_reported():
+    text = """
+        package A {
+            package B { part def Board {} }
+            package C { part def Board {} }
+            package D {
+                part def System { part board : Board; }
+            }
+        }
+        """
+    with pytest.warns(UserWarning, match="Ambiguous reference"):
+        visitor = visit_sysml2_text(text)
+
+    row = find_row(visitor, "A::D::System::board")
+    assert row["idx_related_element"] is None
+    assert row["related_element_name"] is None
+    assert len(visitor.ambiguous_references) == 1
+    idx, name, candidates = visitor.ambiguous_references[0]
+    assert idx == row["idx"]
+    assert name == "Board"
+    assert candidates == [
+        find_row(visitor, "A::B::Board")["idx"],
+        find_row(visitor, "A::C::Board")["idx"],
+    ]
+
+
+def test_keywords_table_covers_parser_contexts():
+    visitor = ModelTreeSysML2Visitor()
+    for k in dir(SysML2Parser):
+        if k.endswith("Context") and k[0].isupper():
+            assert k in smv._CONTEXT_KEYWORDS
+            assert visitor._get_keywords(k) == list(smv._match_keywords(k))
+
+    assert visitor._get_keywords("Part_defContext") == ["def", "part"]
+    assert visitor._get_keywords("Import_packageContext") == ["import", "package"]
+    # Unknown context types are classified on first use
+    assert visitor._get_keywords("Port_fooContext") == ["port"]
+    assert "Port_fooContext" in smv._CONTEXT_KEYWORDS
+    del smv._CONTEXT_KEYWORDS["Port_fooContext"]
+
+
+def test_keywords_lookup_cost_is_constant():
+    """Micro-benchmark: classifying an element costs a table lookup,
+    independent of the context type and of the number of keywords."""
+    visitor = ModelTreeSysML2Visitor()
+    number = 5000
+    contexts = sorted(
+        smv._CONTEXT_KEYWORDS, key=lambda k: len(smv._CONTEXT_KEYWORDS[k])
+    )
+    fewest, most = contexts[0], contexts[-1]
+
+    def best_time(stmt):
+        return min(timeit.repeat(stmt, number=number, repeat=5))
+
+    t_fewest = best_time(lambda: visitor._get_keywords(fewest))
+    t_most = best_time(lambda: visitor._get_keywords(most))
+    t_match = best_time(lambda: smv._match_keywords(most))
+
+    assert t_most < 3 * t_fewest
+    assert t_most * 5 < t_match
+
+
+@pytest.mark.parametrize("intern_names", [False, True])
+def test_fully_qualified_name_from_parent(intern_names: bool):
+    depth = 50
+    text = "".join("package P{} {{".format(i) for i in range(depth))
+    text += "part def Leaf;" + "}" * depth
+    lexer = SysML2Lexer(antlr4.InputStream(text))
+    parser = SysML2Parser(antlr4.CommonTokenStream(lexer))
+    visitor = ModelTreeSysML2Visitor(intern_names=intern_names)
+    visitor.visit(parser.model())
+
+    for idx, row in visitor.model_table_dict.items():
+        assert row["tree_level"] == idx
+        names = ["P{}".format(i) for i in range(idx)]
+        names.append("P{}".format(idx) if idx < depth else "Leaf")
+        assert row["fully_qualified_name"] == "::".join(names)
+        assert row["fully_qualified_name_tagged"] == "::".join(
+            "{}@{}_{}".format(name, i, i - 1 if i else None)
+            for i, name in enumerate(names)
+        )
+
+    leaf = visitor.model_table_dict[depth]
+    expect = "::".join(["P{}".format(i) for i in range(depth)] + ["Leaf"])
+    assert (leaf["fully_qualified_name"] is sys.intern(expect)) == intern_names
+
+
+def synthetic_model_text(n_elements: int, per_package: int = 10) -> str:
+    """A model of about n_elements elements: packages of part definitions."""
+    packages = []
+    for p in range(n_elements // (per_package + 1)):
+        parts = " ".join("part def D{}_{};".format(p, i) for i in range(per_package))
+        packages.append("package P{} {{ {} }}".format(p, parts))
+    return "package Root {{ {} }}".format(" ".join(packages))
+
+
+@pytest.mark.slow
+def test_visit_scales_linearly():
+    """Scaling test: visiting a synthetic 100k element model takes roughly
+    four times as long as visiting a 25k element model."""
+
+    def visit_time(n_elements):
+        text = synthetic_model_text(n_elements)
+        lexer = SysML2Lexer(antlr4.InputStream(text))
+        parser = SysML2Parser(antlr4.CommonTokenStream(lexer))
+        tree = parser.model()
+        visitor = ModelTreeSysML2Visitor()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            visitor.visit(tree)
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        assert len(visitor.model_table_dict) > 0.99 * n_elements
+        return elapsed
+
+    t_small = visit_time(25000)
+    t_large = visit_time(100000)
+    # Linear growth gives a ratio of 4, quadratic growth a ratio of 16
+    assert t_large < 8 * t_small
+
+
+def test_id_strategies():
+    text = """
+        package A {
+            doc overview /* First */
+            package B { doc overview /* Second */ }
+            doc overview /* Duplicate */
+        }
+        """
+    rows = lambda v: list(v.model_table_dict.values())
+
+    uuid5_1 = rows(visit_sysml2_text_with(text, id_strategy="uuid5"))
+    uuid5_2 = rows(visit_sysml2_text_with(text, id_strategy="uuid5"))
+    assert [r["uuid"] for r in uuid5_1] == [r["uuid"] for r in uuid5_2]
+    assert [r["uuid_parent"] for r in uuid5_1] == [r["uuid_parent"] for r in uuid5_2]
+    # Elements with the same fully qualified name still get unique IDs
+    assert uuid5_1[1]["fully_qualified_name"] == uuid5_1[4]["fully_qualified_name"]
+    assert len({r["uuid"] for r in uuid5_1}) == len(uuid5_1)
+
+    uuid4_1 = rows(visit_sysml2_text_with(text))
+    uuid4_2 = rows(visit_sysml2_text_with(text))
+    assert {r["uuid"] for r in uuid4_1}.isdisjoint(r["uuid"] for r in uuid4_2)
+
+    sequential = rows(visit_sysml2_text_with(text, id_strategy="sequential"))
+    assert [r["uuid"] for r in sequential] == [
+        "{:016x}".format(i) for i in range(len(sequential))
+    ]
+    assert sequential[2]["uuid_parent"] == sequential[0]["uuid"]
+
+    custom = rows(
+        visit_sysml2_text_with(text, id_strategy=lambda idx, fqn, tagged: tagged)
+    )
+    assert [r["uuid"] for r in custom] == [
+        r["fully_qualified_name_tagged"] for r in custom
+    ]
+
+    with pytest.raises(ValueError, match="Unknown id strategy"):
+        ModelTreeSysML2Visitor(id_strategy="uuid1")
+
+
+def test_visitor_tables_shared():
+    first = ModelTreeSysML2Visitor()
+    second = ModelTreeSysML2Visitor()
+
+    assert first.parser_contexts_dict is second.parser_contexts_dict
+    assert first.focused_contexts == second.focused_contexts
+    assert "Part_defContext" in first.focused_contexts
+    # Each visitor gets its own list
+    assert first.focused_contexts is not second.focused_contexts
+
+
+def test_unresolved_references_and_imports_recorded():
+    visitor = visit_sysml2_text(
+        """
+        import Units::*;
+        import Cells::AA;
+        package A {
+            part def Board specializes Chip;
+            part def Remote { part cell : AA; }
+        }
+        """
+    )
+    assert visitor.imports == [(0, "Units", True), (1, "Cells::AA", False)]
+    assert visitor.unresolved_references == [
+        (find_row(visitor, "A::Board")["idx"], "Chip"),
+        (find_row(visitor, "A::Remote::cell")["idx"], "AA"),
+    ]
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+import pytest
+
+from pysysml2.modeling.batch import expand_model_paths, map_jobs
+
+
+def test_expand_model_paths(tmp_path: Path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.sysml2").write_text("")
+    (tmp_path / "a.sysml2").write_text("")
+    (tmp_path / "empty").mkdir()
+
+    model_files, errors = expand_model_paths(
+        [tmp_path / "a.sysml2", tmp_path, str(tmp_path / "*.sysml2")]
+        + [tmp_path / "missing", tmp_path / "empty"]
+    )
+
+    assert model_files == [tmp_path / "a.sysml2", tmp_path / "sub" / "b.sysml2"]
+    assert [(arg, type(e), str(e)) for arg, e in errors] == [
+        (str(tmp_path / "missing"), FileNotFoundError, "No such file or directory"),
+        (str(tmp_path / "empty"), ValueError, "No model files found"),
+    ]
+
+
+@pytest.mark.parametrize("jobs", [0, 1, 2])
+def test_map_jobs(jobs: int):
+    assert map_jobs(pow, [(2, 3), (3, 2), (4, 1)], jobs) == [8, 9, 4]
+
+
+def test_map_jobs_negative():
+    with pytest.raises(ValueError, match="Number of jobs"):
+        map_jobs(pow, [(2, 3)], -1)
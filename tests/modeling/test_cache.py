@@ -0,0 +1,124 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from pysysml2.grammar.distpy.SysML2Parser import SysML2Parser
+from pysysml2.modeling.cache import ParseCache, default_cache_dir
+from pysysml2.modeling.model import Model
+
+
+def test_cache_key():
+    cache = ParseCache("unused")
+    key = cache.key(b"package A {}", id_strategy="uuid5")
+
+    assert key == cache.key(b"package A {}", id_strategy="uuid5")
+    assert key != cache.key(b"package B {}", id_strategy="uuid5")
+    assert key != cache.key(b"package A {}", id_strategy="uuid4")
+
+
+def test_cache_get_put(tmp_path: Path):
+    cache = ParseCache(tmp_path / "cache")
+    table = {
+        0: {"idx": 0, "name": "A@0_None", "keywords": ["package"], "parent": None},
+        1: {"idx": 1, "name": "B@1_0", "keywords": ["part"], "parent": "A@0_None"},
+    }
+
+    assert cache.get("key") is None
+    cache.put("key", table)
+    assert cache.get("key") == table
+    assert list(cache.get("key")) == [0, 1]
+
+    cache.clear()
+    assert cache.get("key") is None
+
+
+def test_cache_lru_eviction(tmp_path: Path):
+    table = {0: {"idx": 0, "name": "x" * 1000}}
+    cache = ParseCache(tmp_path, max_size=2500)
+
+    cache.put("a", table)
+    cache.put("b", table)
+    # Entries a and b were used 20s and 10s ago, then a is used again
+    os.utime(tmp_path / "a.json", (0, 1000))
+    os.utime(tmp_path / "b.json", (0, 1010))
+    assert cache.get("a") is not None
+    cache.put("c", table)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_default_cache_dir(monkeypatch):
+    monkeypatch.setenv("PYSYSML2_CACHE_DIR", "/tmp/pysysml2-cache")
+    assert default_cache_dir() == Path("/tmp/pysysml2-cache")
+    monkeypatch.delenv("PYSYSML2_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", "/tmp/xdg")
+    assert default_cache_dir() == Path("/tmp/xdg/pysysml2")
+
+
+@pytest.mark.parametrize("model_name", ["model_1", "model_2"])
+def test_model_from_cache(
+    model_name: str, shared_datadir: Path, tmp_path: Path, monkeypatch
+):
+    model_path = shared_datadir / "models" / f"{model_name}.sysml2"
+    cache = ParseCache(tmp_path)
+
+    parsed = Model()
+    parsed.from_sysml2_file(str(model_path), id_strategy="uuid5", cache=cache)
+    assert parsed.sysml2_visitor is not None
+
+    # A cache hit must not run the parser
+    def fail(self):
+        raise AssertionError("parser called on a cache hit")
+
+    monkeypatch.setattr(SysML2Parser, "model", fail)
+    cached = Model()
+    cached.from_sysml2_file(str(model_path), id_strategy="uuid5", cache=cache)
+
+    assert cached.sysml2_visitor is None
+    assert cached.to_dict() == parsed.to_dict()
+    assert str(cached) == str(parsed)
+    for element in cached.descendants:
+        assert cached.find_element_by_idx(element.idx) is element
+
+    cached.to_csv(tmp_path / "out")
+    assert (tmp_path / "out" / f"{model_name}.csv").exists()
+
+
+def test_model_from_cache_uuid4(shared_datadir: Path, tmp_path: Path):
+    model_path = shared_datadir / "models" / "model_1.sysml2"
+    cache = ParseCache(tmp_path)
+
+    # Random IDs are issued anew on a cache hit, not replayed
+    parsed = Model().from_sysml2_file(model_path, cache=cache)
+    copies = [Model().from_sysml2_file(model_path, cache=cache) for _ in range(2)]
+    models = [parsed] + copies
+    assert all(m.sysml2_visitor is None for m in copies)
+    uuids = [set(e.uuid for e in m.descendants) for m in models]
+    assert len(set.union(*uuids)) == 3 * len(parsed.descendants)
+    for model in copies:
+        for element in model.descendants:
+            assert model.find_element_by_uuid(element.uuid) is element
+            if element.parent is not model:
+                assert element.uuid_parent == element.parent.uuid
+            else:
+                assert element.uuid_parent is None
+        assert str(model) == str(parsed)
+
+
+def test_cache_put_unwritable(tmp_path: Path, shared_datadir: Path):
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_text("")
+    cache = ParseCache(not_a_dir / "cache")
+
+    with pytest.warns(UserWarning, match="Unable to write the parse cache"):
+        cache.put("key", {0: {"idx": 0}})
+    assert cache.get("key") is None
+
+    # The model is still parsed
+    model_path = shared_datadir / "models" / "model_1.sysml2"
+    with pytest.warns(UserWarning, match="Unable to write the parse cache"):
+        model = Model().from_sysml2_file(model_path, cache=cache)
+    assert model.children
@@ -1,16 +1,24 @@
+import io
 import json
+import mmap
 from pathlib import Path
+import re
+import shutil
 
 import pytest
 import pandas as pd
 
-from pysysml2.modeling.model import Model
+from pysysml2.modeling import element
+from pysysml2.modeling import model as model_module
+from pysysml2.modeling.cache import ParseCache
+from pysysml2.modeling.model import ExportError, Model, register_element_type
 
 from ..utils import (
     assert_dicts_equal,
     assert_dataframes_equal,
     requires_graphviz,
     requires_openpyxl,
+    requires_pyarrow,
 )
 
 
@@ -86,6 +94,29 @@ def test_model_to_json(model_name: str, shared_datadir: Path, output_datadir: Pa
     expect_path = expect_datadir / output_name
     output_path = output_datadir / output_name
     assert_model_output_json_equal(output_path, expect_path)
+    # Laid out like json.dumps
+    with open(output_path) as f:
+        text = f.read()
+    assert text == json.dumps(json.loads(text), indent=2, sort_keys=True)
+
+
+@pytest.mark.parametrize("model_name", ["model_1", "model_2"])
+def test_model_to_ndjson(
+    model_name: str, shared_datadir: Path, output_datadir: Path
+):
+
+    model_path = shared_datadir / "models" / f"{model_name}.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+    model.to_JSON(output_datadir, ndjson=True)
+
+    with open(output_datadir / f"{model_name}.ndjson") as f:
+        lines = f.read().splitlines()
+    expect = model.to_dict()
+    assert len(lines) == len(expect)
+    for line in lines:
+        element = json.loads(line)
+        assert element == expect[element["idx"]]
 
 
 @pytest.mark.parametrize("model_name", ["model_1", "model_2"])
@@ -116,6 +147,62 @@ def test_model_to_txt(model_name: str, shared_datadir: Path, output_datadir: Pat
     expect_path = expect_datadir / output_name
     output_path = output_datadir / output_name
     assert_model_output_txt_equal(output_path, expect_path)
+    assert str(model) == expect_path.read_text()
+
+
+def render_tree_txt(node, maxlevel=None):
+    """The text tree, as rendered by anytree."""
+    from anytree import RenderTree
+
+    ss = ""
+    for pre, _, n in RenderTree(node, maxlevel=maxlevel):
+        idx, name = ("root", "") if isinstance(n, Model) else (n.idx, n.name)
+        ss += "{}[{}]: {}\n".format(pre, idx, name)
+    return ss
+
+
+def test_model_to_txt_subtree(shared_datadir: Path, output_datadir: Path, monkeypatch):
+
+    model_path = shared_datadir / "models" / "model_2.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+
+    for max_depth in (0, 1, 2):
+        model.to_txt(output_datadir, max_depth=max_depth)
+        output = (output_datadir / "model_2.txt").read_text()
+        assert output == render_tree_txt(model, maxlevel=max_depth + 1)
+
+    # Subtree of a package, at all depths and up to its grandchildren
+    package = model.find_element_by_idx(8)
+    assert package.children
+    for max_depth in (None, 2):
+        model.to_txt(output_datadir, node=package, max_depth=max_depth)
+        output = (output_datadir / "model_2.txt").read_text()
+        assert output.startswith("[8]: ")
+        maxlevel = None if max_depth is None else max_depth + 1
+        assert output == render_tree_txt(package, maxlevel=maxlevel)
+        with model.exporting():
+            model.to_txt(output_datadir, node=package, max_depth=max_depth)
+        assert (output_datadir / "model_2.txt").read_text() == output
+
+    # Only the subtree is flattened
+    flattenings = []
+
+    class FlatModel(model_module._FlatModel):
+        def __init__(self, model, node=None):
+            super().__init__(model, node)
+            flattenings.append(len(self))
+
+    monkeypatch.setattr(model_module, "_FlatModel", FlatModel)
+    model.to_txt(output_datadir, node=package)
+    assert flattenings == [len(package.descendants) + 1]
+
+    other = Model()
+    other.from_sysml2_file(str(model_path))
+    with pytest.raises(ValueError):
+        model.to_txt(output_datadir, node=other.find_element_by_idx(8))
+    with pytest.raises(ValueError):
+        model.to_txt(output_datadir, max_depth=-1)
 
 
 @requires_openpyxl
@@ -134,7 +221,52 @@ def test_model_to_excel(model_name: str, shared_datadir: Path, output_datadir: P
     assert_model_output_excel_equal(output_path, expect_path)
 
 
-@requires_graphviz(python_only=True)
+@requires_openpyxl
+def test_model_to_excel_sheet_per_type(shared_datadir: Path, output_datadir: Path):
+
+    model_path = shared_datadir / "models" / "model_2.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+    model.to_excel(output_datadir, sheet_per_type=True)
+
+    # Read as objects, as the inferred dtypes depend on the rows of a sheet
+    sheets = pd.read_excel(
+        output_datadir / "model_2.xlsx", sheet_name=None, dtype=object
+    )
+    types = list(dict.fromkeys(e.sysml2_type for e in model.descendants))
+    assert list(sheets) == types
+    expect_df = pd.read_excel(
+        shared_datadir / "expect" / "output" / "model_2.xlsx", dtype=object
+    )
+    for sysml2_type, df in sheets.items():
+        assert (df["sysml2_type"] == sysml2_type).all()
+        assert_dataframes_equal(
+            df.reset_index(drop=True),
+            expect_df[expect_df["sysml2_type"] == sysml2_type].reset_index(
+                drop=True
+            ),
+            ignore_columns=("uuid", "uuid_parent", "parent"),
+        )
+
+
+def read_dot(path: Path):
+    """Returns the nodes, by idx, the cluster idxs and the edges of a DOT file
+    written by Model.to_dot."""
+    text = path.read_text(encoding="utf-8")
+    assert text.startswith("digraph model {")
+    assert text.count("{") == text.count("}")
+    nodes = dict(
+        (int(idx), label)
+        for idx, label in re.findall(r'^\s*e(\d+) \[label="(.*?)"', text, re.M)
+    )
+    clusters = [int(idx) for idx in re.findall(r"subgraph cluster_(\d+)", text)]
+    edges = [
+        (int(tail), int(head), attrs)
+        for tail, head, attrs in re.findall(r"e(\d+) -> e(\d+) \[(.*)\];", text)
+    ]
+    return nodes, clusters, edges
+
+
 @pytest.mark.parametrize("model_name", ["model_1", "model_2"])
 def test_model_to_dot(model_name: str, shared_datadir: Path, output_datadir: Path):
 
@@ -145,9 +277,83 @@ def test_model_to_dot(model_name: str, shared_datadir: Path, output_datadir: Pat
 
     output_name = f"{model_name}.dot"
     output_path = output_datadir / output_name
-    assert output_path
+    nodes, clusters, edges = read_dot(output_path)
+
+    packages = [e for e in model.descendants if e.sysml2_type == "package"]
+    assert clusters == [e.idx for e in packages]
+    assert list(nodes) == [
+        e.idx for e in model.descendants if e.sysml2_type != "package"
+    ]
+    element = model.find_element_by_idx(list(nodes)[-1])
+    assert nodes[element.idx] == "\u00ab{}\u00bb\\n{}".format(
+        element.sysml2_type, element.name.split("@")[0]
+    )
+    owner_edges = [(t, h) for t, h, attrs in edges if "arrowtail=diamond" in attrs]
+    assert owner_edges == [
+        (e.parent.idx, e.idx)
+        for e in model.descendants
+        if e.idx in nodes and e.parent is not model and e.parent.idx in nodes
+    ]
+    related_edges = [(t, h) for t, h, attrs in edges if "arrowtail" not in attrs]
+    assert related_edges == [
+        (e.idx, e.idx_related_element)
+        for e in model.descendants
+        if e.idx_related_element is not None
+    ]
+
+
+def test_model_to_dot_relationships(shared_datadir: Path, output_datadir: Path):
+
+    model_path = shared_datadir / "models" / "model_3.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+    model.to_dot(output_datadir)
+    nodes, clusters, edges = read_dot(output_datadir / "model_3.dot")
+
+    idx = dict((e.name.split("@")[0], e.idx) for e in model.descendants)
+    relationship_edges = dict(
+        ((t, h), attrs) for t, h, attrs in edges if "arrowtail" not in attrs
+    )
+    # connect and message elements are drawn as edges only
+    assert not any(
+        model.find_element_by_idx(i).sysml2_type in ("connect", "message")
+        for i in nodes
+    )
+    assert "penwidth" in relationship_edges[(idx["gpio"], idx["Led"])]
+    assert "penwidth" in relationship_edges[(idx["usb"], idx["Chip"])]
+    assert "arrowhead=empty" in relationship_edges[(idx["Board"], idx["Device"])]
+    message = relationship_edges[(idx["Camera"], idx["Board"])]
+    assert 'label="Camera.image"' in message
+    assert len(relationship_edges) == 5
 
-    # TODO: check contents of generated file
+
+def test_model_to_dot_filters(shared_datadir: Path, output_datadir: Path):
+
+    model_path = shared_datadir / "models" / "model_3.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+    output_path = output_datadir / "model_3.dot"
+
+    model.to_dot(output_datadir, sysml2_types={"part", "port", "package"})
+    nodes, clusters, edges = read_dot(output_path)
+    assert clusters == [0, 3]
+    assert set(model.find_element_by_idx(i).sysml2_type for i in nodes) == {
+        "part",
+        "port",
+    }
+    assert all(t in nodes and h in nodes for t, h, _ in edges)
+
+    model.to_dot(output_datadir, max_depth=2)
+    nodes, clusters, edges = read_dot(output_path)
+    assert clusters == [0, 3]
+    assert list(nodes) == [1, 2]
+    assert edges == []
+
+    model.to_dot(output_datadir, cluster_packages=False)
+    nodes, clusters, edges = read_dot(output_path)
+    assert clusters == []
+    assert list(nodes) == [e.idx for e in model.descendants if e.idx in nodes]
+    assert (0, 3) in [(t, h) for t, h, _ in edges]
 
 
 @requires_graphviz
@@ -161,6 +367,529 @@ def test_model_to_png(model_name: str, shared_datadir: Path, output_datadir: Pat
 
     output_name = f"{model_name}.png"
     output_path = output_datadir / output_name
-    assert output_path
+    assert output_path.read_bytes().startswith(b"\x89PNG")
+
+    model.to_png(output_datadir, layout="sfdp", unflatten=True)
+    assert output_path.read_bytes().startswith(b"\x89PNG")
+
+
+@pytest.mark.parametrize("model_name", ["model_1", "model_2"])
+def test_model_find_element_by_idx(model_name: str, shared_datadir: Path):
+
+    model_path = shared_datadir / "models" / f"{model_name}.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+
+    elements = model.descendants
+    assert elements
+    for element in elements:
+        assert model.find_element_by_idx(element.idx) is element
+        assert model.find_element_by_uuid(element.uuid) is element
+    assert model.find_element_by_idx(len(elements)) is None
+    assert model.find_element_by_uuid("not-a-uuid") is None
+
+
+def test_model_index_follows_tree_changes(shared_datadir: Path):
+
+    model_path = shared_datadir / "models" / "model_1.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+
+    # Detaching a subtree removes it, and its descendants, from the index
+    package = model.find_element_by_idx(4)
+    child = package.children[0]
+    package.parent = None
+    assert model.find_element_by_idx(4) is None
+    assert model.find_element_by_idx(child.idx) is None
+    assert model.find_element_by_uuid(child.uuid) is None
+
+    # Re-attaching it restores the index
+    package.parent = model.find_element_by_idx(0)
+    assert model.find_element_by_idx(4) is package
+    assert model.find_element_by_idx(child.idx) is child
+
+    # Re-parenting within the model keeps the index consistent
+    child.parent = model
+    assert model.find_element_by_idx(child.idx) is child
+    assert child.parent is model
+
+
+@pytest.mark.parametrize("model_name", ["model_1", "model_2"])
+def test_model_deterministic_ids(
+    model_name: str, shared_datadir: Path, output_datadir: Path
+):
+
+    model_path = shared_datadir / "models" / f"{model_name}.sysml2"
+    outputs = []
+    for run in ("a", "b"):
+        model = Model()
+        model.from_sysml2_file(str(model_path), id_strategy="uuid5")
+        model.to_JSON(output_datadir / run)
+        outputs.append((output_datadir / run / f"{model_name}.json").read_bytes())
+
+    assert outputs[0] == outputs[1]
+
+
+@pytest.mark.parametrize("model_name", ["model_1", "model_2"])
+def test_model_parse_mode_sll(model_name: str, shared_datadir: Path):
+
+    model_path = shared_datadir / "models" / f"{model_name}.sysml2"
+    ll_model = Model()
+    ll_model.from_sysml2_file(str(model_path), id_strategy="uuid5")
+    sll_model = Model()
+    sll_model.from_sysml2_file(str(model_path), id_strategy="uuid5", parse_mode="sll")
+
+    assert sll_model.to_dict() == ll_model.to_dict()
+
+    with pytest.raises(ValueError, match="Unknown parse mode"):
+        Model().from_sysml2_file(str(model_path), parse_mode="lr")
+
+
+@pytest.mark.parametrize(
+    "input_kind", ["str", "bytes", "bytearray", "text_io", "bytes_io", "file", "mmap"]
+)
+def test_model_from_sysml2_string(input_kind: str, shared_datadir: Path):
+
+    model_path = shared_datadir / "models" / "model_2.sysml2"
+    expect = Model().from_sysml2_file(str(model_path), id_strategy="uuid5")
+    data = model_path.read_bytes()
+
+    model = Model()
+    with open(model_path, "rb") as f:
+        if input_kind == "str":
+            model.from_sysml2_string(data.decode(), id_strategy="uuid5")
+        elif input_kind in ("bytes", "bytearray"):
+            data = data if input_kind == "bytes" else bytearray(data)
+            model.from_sysml2_string(data, id_strategy="uuid5")
+        elif input_kind == "text_io":
+            model.from_sysml2_stream(io.StringIO(data.decode()), id_strategy="uuid5")
+        elif input_kind == "bytes_io":
+            model.from_sysml2_stream(io.BytesIO(data), id_strategy="uuid5")
+        elif input_kind == "file":
+            model.from_sysml2_stream(f, id_strategy="uuid5")
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                model.from_sysml2_stream(m, id_strategy="uuid5")
+
+    if input_kind == "file":
+        assert model.input_file == str(model_path)
+    else:
+        assert model.input_file is None
+    expect.input_file = model.input_file
+    assert model.to_dict() == expect.to_dict()
+
+
+def test_model_from_sysml2_file_parse_tree_text(tmp_path: Path, shared_datadir: Path):
+
+    model_path = tmp_path / "model_1.sysml2"
+    shutil.copy(shared_datadir / "models" / "model_1.sysml2", model_path)
+    size = model_path.stat().st_size
+    model = Model().from_sysml2_file(str(model_path))
+
+    # The parse tree kept by the visitor does not depend on the file
+    model_path.write_text("")
+    name, ctx = model.sysml2_visitor.element_ctxs[0]
+    assert ctx.getText().startswith("package" + name)
+    assert ctx.start.getInputStream().size == size
+
+
+def test_model_from_sysml2_string_unicode(output_datadir: Path):
+
+    text = "package P {\n    doc /* Länge in µm */\n    part def Teil;\n}\n"
+    expect = Model().from_sysml2_string(text, id_strategy="uuid5")
+    assert "Länge in µm" in json.dumps(expect.to_dict(), ensure_ascii=False)
+
+    for encoding in ("utf-8", "utf-16"):
+        model = Model().from_sysml2_string(
+            text.encode(encoding), encoding=encoding, id_strategy="uuid5"
+        )
+        assert model.to_dict() == expect.to_dict()
+    with pytest.raises(UnicodeDecodeError):
+        Model().from_sysml2_string(text.encode("utf-8"), encoding="ascii")
+
+    # Exports need a file name, as there is no input file
+    with pytest.raises(ValueError, match="No output file name"):
+        expect.to_JSON(output_datadir)
+    expect.to_JSON(output_datadir, file="unicode.sysml2")
+    assert (output_datadir / "unicode.json").exists()
+
+
+def test_model_elements_slotted(shared_datadir: Path, output_datadir: Path):
+
+    model_path = shared_datadir / "models" / "model_2.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
 
-    # TODO: check contents of generated file
+    for element in model.descendants:
+        # All attributes are in slots, the instance __dict__ stays empty
+        assert not vars(element)
+        assert element.sysml2_layer is type(element).sysml2_layer
+        assert element.archtype is type(element).archtype
+        dd = element.to_dict()
+        assert dd["parent"] == element.parent.name
+        assert dd["sysml2_layer"] == element.sysml2_layer
+        assert json.loads(element.to_JSON())["idx"] == element.idx
+
+    # Attributes outside of the slots still work, and are exported
+    element = model.find_element_by_idx(1)
+    element.note = "extra"
+    model.to_JSON(output_datadir)
+    with open(output_datadir / "model_2.json") as f:
+        data = json.load(f)
+    [exported] = [d for d in data["children"] if d["idx"] == 1]
+    assert exported["note"] == "extra"
+
+
+def test_model_register_element_type(shared_datadir: Path, monkeypatch):
+
+    monkeypatch.setattr(model_module, "_ELEMENT_TYPES", dict(model_module._ELEMENT_TYPES))
+    monkeypatch.setattr(model_module, "_element_class_cache", {})
+    resolve = model_module._resolve_element_class
+
+    assert resolve("part", ["part"]) is element.Part
+    assert resolve("part", ["part", "specializes"]) is element.RelationshipSpecializes
+    assert resolve("usecase", ["case", "use"]) is element.UseCase
+    with pytest.raises(NotImplementedError):
+        resolve("about", ["about"])
+    with pytest.raises(Exception, match="Unknown root sysml2 type"):
+        resolve("block", ["block"])
+    with pytest.raises(ValueError):
+        register_element_type(element.Part)
+
+    class Block(element.Element):
+        sysml2_layer = element.ArchitectureLayers.systems_element.value
+
+    register_element_type(Block, sysml2_type="part")
+    model_path = shared_datadir / "models" / "model_1.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+
+    parts = [e for e in model.descendants if e.sysml2_type == "part"]
+    assert parts
+    for e in parts:
+        assert type(e) is Block or "specializes" in e.keywords
+
+
+@pytest.mark.parametrize("model_name", ["model_1", "model_2"])
+def test_model_single_pass(model_name: str, shared_datadir: Path, tmp_path: Path):
+
+    model_path = shared_datadir / "models" / f"{model_name}.sysml2"
+    two_pass = Model()
+    two_pass.from_sysml2_file(str(model_path), id_strategy="uuid5")
+    single_pass = Model()
+    single_pass.from_sysml2_file(
+        str(model_path), id_strategy="uuid5", single_pass=True
+    )
+
+    assert single_pass.sysml2_visitor._model_table_dict == {}
+    assert single_pass.to_dict() == two_pass.to_dict()
+    assert str(single_pass) == str(two_pass)
+    for element in single_pass.descendants:
+        assert single_pass.find_element_by_idx(element.idx) is element
+
+    # The model table is built on first use
+    pd.testing.assert_frame_equal(
+        single_pass.sysml2_visitor.model_table_df.drop(columns="parent"),
+        two_pass.sysml2_visitor.model_table_df.drop(columns="parent"),
+    )
+
+    # Cached rows are the same as from the two pass mode
+    cache = ParseCache(tmp_path)
+    Model().from_sysml2_file(
+        str(model_path), id_strategy="uuid5", cache=cache, single_pass=True
+    )
+    cached = Model()
+    cached.from_sysml2_file(str(model_path), id_strategy="uuid5", cache=cache)
+    assert cached.sysml2_visitor is None
+    assert cached.to_dict() == two_pass.to_dict()
+
+
+def test_model_table_df_cached(shared_datadir: Path, tmp_path: Path):
+
+    model_path = shared_datadir / "models" / "model_1.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+
+    for df in (model.model_table_df, model.sysml2_visitor.model_table_df):
+        assert str(df["sysml2_type"].dtype) == "category"
+        assert str(df["context_type"].dtype) == "category"
+        for column in ("idx", "idx_parent", "idx_related_element", "tree_level"):
+            assert str(df[column].dtype) == "Int64"
+        assert df["idx_parent"].isna().sum() == len(model.children)
+        assert len(df) == len(model.descendants)
+
+    # The visitor table is cached, the model table reflects model edits
+    assert model.sysml2_visitor.model_table_df is model.sysml2_visitor.model_table_df
+    element = model.find_element_by_idx(1)
+    element.name = "RENAMED@1_0"
+    assert model.model_table_df["name"].tolist()[1] == "RENAMED@1_0"
+    model.to_csv(tmp_path)
+    assert "RENAMED@1_0" in (tmp_path / "model_1.csv").read_text()
+    package = model.find_element_by_idx(4)
+    package.parent = None
+    assert len(model.model_table_df) == len(model.descendants)
+    assert 4 not in model.model_table_df["idx"].tolist()
+
+    # Shared by the exports in exporting()
+    with model.exporting():
+        assert model.model_table_df is model.model_table_df
+
+
+@requires_pyarrow
+@pytest.mark.parametrize("model_name", ["model_1", "model_2"])
+def test_model_to_parquet(model_name: str, shared_datadir: Path, output_datadir: Path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    model_path = shared_datadir / "models" / f"{model_name}.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+    model.to_parquet(output_datadir)
+
+    table = pq.read_table(output_datadir / f"{model_name}.parquet")
+    assert table.equals(model.to_arrow())
+    assert pa.types.is_dictionary(table.schema.field("sysml2_type").type)
+    assert pa.types.is_list(table.schema.field("keywords").type)
+
+    expect = model.to_dict()
+    rows = table.to_pylist()
+    assert [row["idx"] for row in rows] == list(expect)
+    for row in rows:
+        element = expect[row["idx"]]
+        related = element["related_element_name"]
+        assert row["related_element_name"] == (
+            [related] if isinstance(related, str) else related
+        )
+        del row["related_element_name"], element["related_element_name"]
+        assert row == element
+
+
+@pytest.mark.parametrize("model_name", ["model_1", "model_2"])
+def test_model_sqlite(
+    model_name: str, shared_datadir: Path, output_datadir: Path, monkeypatch
+):
+    import sqlite3
+
+    from pysysml2.grammar.distpy.SysML2Parser import SysML2Parser
+
+    model_path = shared_datadir / "models" / f"{model_name}.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+    model.to_sqlite(output_datadir)
+    # Writing again replaces the database
+    model.to_sqlite(output_datadir)
+    db_path = output_datadir / f"{model_name}.sqlite"
+
+    # Loading must not run the parser
+    def fail(self):
+        raise AssertionError("parser called when loading from SQLite")
+
+    monkeypatch.setattr(SysML2Parser, "model", fail)
+    loaded = Model()
+    loaded.from_sqlite(db_path)
+
+    assert loaded.sysml2_visitor is None
+    assert loaded.input_file == str(model_path)
+    assert loaded.to_dict() == model.to_dict()
+    assert str(loaded) == str(model)
+    for element in loaded.descendants:
+        assert type(element) is type(model.find_element_by_idx(element.idx))
+
+    conn = sqlite3.connect(db_path)
+    try:
+        (count,) = conn.execute("SELECT count(*) FROM elements").fetchone()
+        assert count == len(model.descendants)
+        # Children of the first package, through the parent edges
+        package = model.children[0]
+        children = conn.execute(
+            "SELECT e.idx FROM parent_edges p JOIN elements e ON e.idx = p.idx "
+            "WHERE p.idx_parent = ? ORDER BY e.position",
+            (package.idx,),
+        ).fetchall()
+        assert [idx for (idx,) in children] == [e.idx for e in package.children]
+        # Relationships, through the relationship edges
+        edges = conn.execute(
+            "SELECT idx, idx_related_element, kind FROM relationship_edges"
+        ).fetchall()
+        assert edges == [
+            (e.idx, e.idx_related_element, e.sysml2_type)
+            for e in model.descendants
+            if e.idx_related_element is not None
+        ]
+    finally:
+        conn.close()
+
+
+def test_model_sqlite_follows_tree(shared_datadir: Path, output_datadir: Path):
+
+    model_path = shared_datadir / "models" / "model_1.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+    # Move a package to the end of the model
+    package = model.find_element_by_idx(4)
+    package.parent = model
+    model.to_sqlite(output_datadir)
+
+    loaded = Model().from_sqlite(output_datadir / "model_1.sqlite")
+    assert str(loaded) == str(model)
+    assert loaded.find_element_by_idx(4).parent is loaded
+
+    with pytest.raises(FileNotFoundError):
+        Model().from_sqlite(output_datadir / "missing.sqlite")
+
+
+@pytest.mark.parametrize("model_name", ["model_1", "model_2"])
+def test_model_snapshot(
+    model_name: str, shared_datadir: Path, output_datadir: Path, monkeypatch
+):
+    from pysysml2.grammar.distpy.SysML2Parser import SysML2Parser
+
+    model_path = shared_datadir / "models" / f"{model_name}.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+    model.save_snapshot(output_datadir)
+    snapshot_path = output_datadir / f"{model_name}.snapshot"
+
+    # Loading must not run the parser
+    def fail(self):
+        raise AssertionError("parser called when loading a snapshot")
+
+    monkeypatch.setattr(SysML2Parser, "model", fail)
+    loaded = Model().load_snapshot(snapshot_path)
+
+    assert loaded.sysml2_visitor is None
+    assert loaded.input_file == str(model_path)
+    assert loaded.to_dict() == model.to_dict()
+    assert str(loaded) == str(model)
+    for element in loaded.descendants:
+        assert type(element) is type(model.find_element_by_idx(element.idx))
+        assert loaded.find_element_by_uuid(element.uuid) is element
+
+    # The loaded tree is a regular anytree tree
+    element = loaded.descendants[-1]
+    element.parent = None
+    assert loaded.find_element_by_idx(element.idx) is None
+    element.parent = loaded
+    assert loaded.children[-1] is element
+    assert loaded.find_element_by_idx(element.idx) is element
+
+
+def test_model_snapshot_follows_tree(shared_datadir: Path, output_datadir: Path):
+
+    model_path = shared_datadir / "models" / "model_1.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+    # Move a package to the end of the model
+    package = model.find_element_by_idx(4)
+    package.parent = model
+    # Connections relate lists of elements
+    package.related_element_name = ["A::b", None]
+    model.save_snapshot(output_datadir)
+
+    loaded = Model().load_snapshot(output_datadir / "model_1.snapshot")
+    assert str(loaded) == str(model)
+    assert loaded.to_dict() == model.to_dict()
+    assert loaded.find_element_by_idx(4).parent is loaded
+    assert loaded.find_element_by_idx(4).related_element_name == ["A::b", None]
+
+
+def test_model_snapshot_errors(shared_datadir: Path, output_datadir: Path):
+
+    model_path = shared_datadir / "models" / "model_1.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+    model.save_snapshot(output_datadir)
+    data = (output_datadir / "model_1.snapshot").read_bytes()
+
+    bad_path = output_datadir / "bad.snapshot"
+    for bad_data, match in [
+        (b"", "Not a PySysML2 model snapshot"),
+        (b"not a snapshot at all", "Not a PySysML2 model snapshot"),
+        (data[:12] + b"\xff\xff" + data[14:], "Unsupported model snapshot version"),
+        (data[:-1], "Corrupt model snapshot"),
+    ]:
+        bad_path.write_bytes(bad_data)
+        with pytest.raises(ValueError, match=match):
+            Model().load_snapshot(bad_path)
+
+    with pytest.raises(FileNotFoundError):
+        Model().load_snapshot(output_datadir / "missing.snapshot")
+
+
+@pytest.mark.parametrize("threads", [1, 3])
+def test_model_export(
+    threads: int, shared_datadir: Path, output_datadir: Path, monkeypatch
+):
+
+    model_path = shared_datadir / "models" / "model_2.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+    formats = ["json", "ndjson", "txt", "csv", "snapshot", "dot"]
+    separate_dir = output_datadir / "separate"
+    model.to_JSON(separate_dir)
+    model.to_JSON(separate_dir, ndjson=True)
+    model.to_txt(separate_dir)
+    model.to_csv(separate_dir)
+    model.save_snapshot(separate_dir)
+    model.to_dot(separate_dir)
+
+    # The model is flattened once, for all formats
+    flattenings = []
+
+    class FlatModel(model_module._FlatModel):
+        def __init__(self, model):
+            flattenings.append(model)
+            super().__init__(model)
+
+    monkeypatch.setattr(model_module, "_FlatModel", FlatModel)
+    export_dir = output_datadir / "export"
+    model.export([fmt.upper() for fmt in formats], export_dir, threads=threads)
+
+    assert flattenings == [model]
+    assert model._flat is None
+    for ext in ("json", "ndjson", "txt", "csv", "snapshot", "dot"):
+        output_name = f"model_2.{ext}"
+        assert (export_dir / output_name).read_bytes() == (
+            separate_dir / output_name
+        ).read_bytes()
+
+    # Exports outside of export() flatten the current model
+    element = model.find_element_by_idx(5)
+    element.name = "renamed@5_3"
+    assert "[5]: renamed@5_3" in str(model)
+    assert len(flattenings) == 2
+
+
+@pytest.mark.parametrize("threads", [1, 3])
+def test_model_export_errors(threads: int, shared_datadir: Path, output_datadir: Path):
+
+    model_path = shared_datadir / "models" / "model_1.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+    (output_datadir / "model_1.json").mkdir()
+    (output_datadir / "model_1.txt").mkdir()
+
+    # All formats are exported, and the errors of all failed formats raised
+    with pytest.raises(ExportError) as excinfo:
+        model.export(["json", "csv", "txt"], output_datadir, threads=threads)
+    assert list(excinfo.value.errors) == ["json", "txt"]
+    assert all(isinstance(e, OSError) for e in excinfo.value.errors.values())
+    assert (output_datadir / "model_1.csv").exists()
+
+
+def test_model_export_unknown_format(shared_datadir: Path, output_datadir: Path):
+
+    model_path = shared_datadir / "models" / "model_1.sysml2"
+    model = Model()
+    model.from_sysml2_file(str(model_path))
+    with pytest.raises(ValueError, match="Unknown format 'yaml'"):
+        model.export(["json", "yaml"], output_datadir)
+    # Formats are checked before anything is exported
+    assert not (output_datadir / "model_1.json").exists()
+
+    with model.exporting():
+        flat = model._flat
+        with model.exporting():
+            assert model._flat is flat
+        assert model._flat is flat
+    assert model._flat is None
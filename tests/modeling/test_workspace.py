@@ -0,0 +1,136 @@
+from pathlib import Path
+
+from anytree import PreOrderIter
+import pytest
+
+from pysysml2.modeling import Model, Workspace
+
+
+def find_element(model: Model, fqn: str):
+    matches = [
+        e
+        for e in PreOrderIter(model)
+        if e is not model
+        and e.sysml2_type != "import"
+        and e.fully_qualified_name == fqn
+    ]
+    assert len(matches) == 1, fqn
+    return matches[0]
+
+
+def test_workspace_load(shared_datadir: Path):
+
+    workspace_dir = shared_datadir / "workspace"
+    workspace = Workspace().load(workspace_dir)
+    model = workspace.model
+
+    assert workspace.files == [
+        workspace_dir / "parts" / "cells.sysml2",
+        workspace_dir / "product.sysml2",
+        workspace_dir / "units.sysml2",
+    ]
+    assert model.input_file == workspace_dir
+    elements = [e for e in PreOrderIter(model) if e is not model]
+    assert [e.idx for e in elements] == list(range(len(elements)))
+    assert len({e.uuid for e in elements}) == len(elements)
+    assert len({e.name for e in elements}) == len(elements)
+    assert workspace.file_of(find_element(model, "Product::Board")) == (
+        workspace_dir / "product.sysml2"
+    )
+
+    # Specialization of an element of another file
+    battery = find_element(model, "Units::Battery")
+    aa = find_element(model, "Cells::AA")
+    assert aa.idx_related_element == battery.idx
+    assert aa.related_element_name == battery.name
+    # Redefinition of a feature of the general type, in another file
+    voltage = find_element(model, "Cells::AA::voltage")
+    battery_voltage = find_element(model, "Units::Battery::voltage")
+    assert voltage.idx_related_element == battery_voltage.idx
+    # The imported AA, not Units::AA
+    cell = find_element(model, "Product::Remote::cell")
+    assert cell.idx_related_element == aa.idx
+    board = find_element(model, "Product::Board")
+    assert board.idx_related_element == find_element(model, "Units::Chip").idx
+
+    # Imports refer to the imported namespace, unless it is not in the workspace
+    imports = [e for e in elements if e.sysml2_type == "import"]
+    assert [e.idx_related_element for e in imports] == [
+        find_element(model, "Units").idx,
+        aa.idx,
+        None,
+    ]
+    assert workspace.unresolved_references == [(imports[2].idx, "ScalarValues")]
+    assert workspace.ambiguous_references == []
+
+
+def test_workspace_load_parallel(shared_datadir: Path):
+
+    workspace_dir = shared_datadir / "workspace"
+    serial = Workspace().load(workspace_dir, id_strategy="uuid5")
+    parallel = Workspace().load(workspace_dir, jobs=2, id_strategy="uuid5")
+
+    assert parallel.model.to_dict() == serial.model.to_dict()
+    assert parallel.unresolved_references == serial.unresolved_references
+
+
+def test_workspace_load_generator(shared_datadir: Path):
+
+    workspace_dir = shared_datadir / "workspace"
+    paths = (workspace_dir / name for name in ("parts", "product.sysml2"))
+    workspace = Workspace().load(paths, id_strategy="uuid5")
+
+    assert workspace.files == [
+        workspace_dir / "parts" / "cells.sysml2",
+        workspace_dir / "product.sysml2",
+    ]
+    assert workspace.model.input_file is None
+
+
+@pytest.mark.parametrize("model_name", ["model_1", "model_2", "model_3"])
+def test_workspace_single_file(model_name: str, shared_datadir: Path):
+
+    model_path = shared_datadir / "models" / f"{model_name}.sysml2"
+    expect = Model().from_sysml2_file(model_path, id_strategy="uuid5")
+    expect.input_file = None
+    workspace = Workspace().load(model_path, id_strategy="uuid5")
+
+    assert workspace.model.to_dict() == expect.to_dict()
+
+
+def test_workspace_errors(tmp_path: Path):
+
+    with pytest.raises(FileNotFoundError):
+        Workspace().load(tmp_path / "missing")
+    with pytest.raises(ValueError, match="No model files found"):
+        Workspace().load(tmp_path)
+    (tmp_path / "a.sysml2").write_text("package A {}")
+    with pytest.raises(ValueError, match="Unknown parse mode"):
+        Workspace().load(tmp_path, parse_mode="lr")
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_workspace_ambiguous_references(jobs: int, tmp_path: Path):
+
+    (tmp_path / "a.sysml2").write_text(
+        """
+        package A {
+            package B { part def Board; }
+            package C { part def Board; }
+            package D { part def System { part board : Board; } }
+        }
+        """
+    )
+    (tmp_path / "e.sysml2").write_text("package E { part def Other; }")
+    with pytest.warns(UserWarning, match="Ambiguous reference to 'Board'"):
+        workspace = Workspace().load(tmp_path, jobs=jobs)
+    model = workspace.model
+
+    board = find_element(model, "A::D::System::board")
+    assert board.idx_related_element is None
+    candidates = [
+        find_element(model, "A::B::Board").idx,
+        find_element(model, "A::C::Board").idx,
+    ]
+    assert workspace.ambiguous_references == [(board.idx, "Board", candidates)]
+    assert workspace.unresolved_references == []
@@ -17,6 +17,11 @@ try:
 except ImportError:
     pass
 
+try:
+    import pyarrow
+except ImportError:
+    pass
+
 
 def requires_openpyxl(f: Callable):
     """Decorator that marks a test function to be skipped in openpyxl is not
@@ -27,6 +32,15 @@ def requires_openpyxl(f: Callable):
     return skipif(f)
 
 
+def requires_pyarrow(f: Callable):
+    """Decorator that marks a test function to be skipped in pyarrow is not
+    installed."""
+    skipif = pytest.mark.skipif(
+        "pyarrow" not in sys.modules, reason="requires pyarrow package"
+    )
+    return skipif(f)
+
+
 def requires_graphviz(f: Optional[Callable] = None, python_only: bool = False):
     """Decorator that marks a test function to be skipped in graphviz is not
     installed."""